@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import WebcamModel, ModelCategory, Favourite, XLoveCashTag, Subscription, Notification
+from .models import (
+    WebcamModel, ModelCategory, ModelStatusEvent, Favourite, XLoveCashTag, Subscription, Notification
+)
 
 
 @admin.register(WebcamModel)
@@ -8,7 +10,10 @@ class WebcamModelAdmin(admin.ModelAdmin):
     list_filter = ['source', 'is_online', 'is_naked', 'gender', 'created_at']
     search_fields = ['display_name', 'user_name', 'model_id', 'description']
     list_editable = ['is_online']
-    readonly_fields = ['created_at', 'updated_at', 'nudity_last_check', 'nudity_image_hash']
+    readonly_fields = [
+        'created_at', 'updated_at', 'nudity_last_check', 'nudity_image_hash', 'nudity_phash',
+        'nudity_check_interval', 'nudity_next_check', 'content_hash'
+    ]
 
     fieldsets = (
         ('Basic Information', {
@@ -18,13 +23,14 @@ class WebcamModelAdmin(admin.ModelAdmin):
             'fields': ('age', 'gender', 'description', 'is_online')
         }),
         ('Nudity Detection', {
-            'fields': ('is_naked', 'nudity_confidence', 'nudity_last_check', 'nudity_image_hash')
+            'fields': ('is_naked', 'nudity_confidence', 'nudity_last_check', 'nudity_image_hash', 'nudity_phash',
+                       'nudity_check_interval', 'nudity_next_check')
         }),
         ('Media & Links', {
             'fields': ('image', 'iframe', 'link_embed', 'link_snapshot', 'url_stream', 'chat_url')
         }),
         ('Data', {
-            'fields': ('json_data',),
+            'fields': ('json_data', 'content_hash'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -41,6 +47,14 @@ class ModelCategoryAdmin(admin.ModelAdmin):
     search_fields = ['model__display_name', 'category__name']
 
 
+@admin.register(ModelStatusEvent)
+class ModelStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['model', 'source', 'is_online', 'created_at']
+    list_filter = ['source', 'is_online', 'created_at']
+    search_fields = ['model__display_name', 'model__user_name']
+    readonly_fields = ['model', 'source', 'is_online', 'created_at']
+
+
 @admin.register(Favourite)
 class FavouriteAdmin(admin.ModelAdmin):
     list_display = ['user', 'model', 'created_at']
@@ -78,17 +92,17 @@ class SubscriptionAdmin(admin.ModelAdmin):
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ['id', 'subscription', 'model', 'notification_type', 'status', 'sent_at', 'created_at']
+    list_display = ['id', 'subscription', 'model', 'notification_type', 'status', 'attempts', 'sent_at', 'created_at']
     list_filter = ['status', 'notification_type', 'created_at', 'sent_at']
     search_fields = ['subscription__user__username', 'model__display_name', 'error_message']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'attempts', 'next_attempt_at', 'fanout_id']
 
     fieldsets = (
         ('Notification Details', {
             'fields': ('subscription', 'model', 'notification_type', 'status')
         }),
         ('Delivery Information', {
-            'fields': ('sent_at', 'error_message')
+            'fields': ('sent_at', 'error_message', 'attempts', 'next_attempt_at', 'fanout_id')
         }),
         ('Timestamps', {
             'fields': ('created_at',),
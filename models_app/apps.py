@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ModelsAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "models_app"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,176 @@
+"""
+Sharded notification fan-out.
+A model's due subscriptions are split into subscription id ranges that
+workers process in parallel, and each fan-out is tracked in the cache under
+its own id (carried by its shards and notifications) to measure the latency
+from detection to the last email sent.
+"""
+import logging
+import math
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+from .subscription_index import get_subscription_ids
+
+logger = logging.getLogger(__name__)
+
+# Per-fan-out progress: shards still running, emails not yet delivered, detection time
+FANOUT_KEY = 'notifications:fanout:%s:%s'
+FANOUT_TTL = 86400
+# Detection-to-last-email latency across fan-outs
+LATENCY_CACHE_KEY = 'notifications:fanout:latency'
+LATENCY_SMOOTHING = 0.2
+
+# Don't notify a subscriber again within this many minutes
+NOTIFY_COOLDOWN_MINUTES = 30
+
+
+def due_subscriptions(model_id: int, now: datetime = None):
+    """Active subscriptions of a model that weren't notified within the cooldown"""
+    from .models import Subscription
+
+    threshold = (now or timezone.now()) - timezone.timedelta(minutes=NOTIFY_COOLDOWN_MINUTES)
+    return Subscription.objects.filter(
+        model_id=model_id,
+        is_active=True
+    ).filter(
+        Q(last_notified_at__isnull=True) |
+        Q(last_notified_at__lt=threshold)
+    )
+
+
+def plan_shards(model_id: int, now: datetime = None) -> Tuple[int, List[Tuple[int, Optional[int]]]]:
+    """
+    Split the due subscriptions' id range into roughly equal shards of about
+    NOTIFICATION_SHARD_SIZE subscriptions, at most NOTIFICATION_MAX_SHARDS.
+    When the Redis index is available, the model's indexed subscription ids
+    only place the shard boundaries: the first shard starts at 0 and the last
+    is open-ended (last id None), so the shards' database queries still reach
+    every due subscription the index missed.
+    Returns: (due count, or active count from the index, [(first id, last id), ...])
+    """
+    shard_size = int(getattr(settings, 'NOTIFICATION_SHARD_SIZE', 1000))
+    max_shards = int(getattr(settings, 'NOTIFICATION_MAX_SHARDS', 8))
+
+    subscription_ids = get_subscription_ids(model_id)
+    if subscription_ids is not None:
+        # One indexed EXISTS instead of an aggregate; nothing to plan while everyone is in cooldown
+        if not due_subscriptions(model_id, now).exists():
+            return 0, []
+        # Split by members rather than id span so shards hold equal numbers of subscriptions
+        shard_count = max(min(math.ceil(len(subscription_ids) / shard_size), max_shards), 1)
+        per_shard = math.ceil(len(subscription_ids) / shard_count)
+        boundaries = [subscription_ids[i - 1] for i in range(per_shard, len(subscription_ids), per_shard)]
+        firsts = [0] + [boundary + 1 for boundary in boundaries]
+        return len(subscription_ids), list(zip(firsts, boundaries + [None]))
+
+    stats = due_subscriptions(model_id, now).aggregate(first=Min('id'), last=Max('id'), count=Count('id'))
+    if not stats['count']:
+        return 0, []
+
+    shard_count = max(min(math.ceil(stats['count'] / shard_size), max_shards), 1)
+
+    span = math.ceil((stats['last'] - stats['first'] + 1) / shard_count)
+    ranges = []
+    for i in range(shard_count):
+        first = stats['first'] + i * span
+        if first > stats['last']:
+            break
+        ranges.append((first, min(first + span - 1, stats['last'])))
+    return stats['count'], ranges
+
+
+def start_fanout(model_id: int, detected_at: datetime, shards: int) -> str:
+    """
+    Begin tracking a fan-out of `shards` shards for a model
+    Returns: the fan-out id to pass to its shards
+    """
+    fanout_id = f"{model_id}-{uuid.uuid4().hex}"
+    try:
+        cache.set_many({
+            FANOUT_KEY % (fanout_id, 'shards'): shards,
+            FANOUT_KEY % (fanout_id, 'pending'): 0,
+            FANOUT_KEY % (fanout_id, 'detected_at'): detected_at,
+        }, FANOUT_TTL)
+    except Exception as e:
+        logger.warning(f"Could not start fan-out tracking for model {model_id}: {e}")
+    return fanout_id
+
+
+def add_pending(fanout_id: str, count: int):
+    """A shard queued `count` emails for delivery"""
+    if fanout_id and count:
+        _incr(FANOUT_KEY % (fanout_id, 'pending'), count)
+
+
+def finish_shard(fanout_id: str):
+    """A shard has queued all of its notifications"""
+    if fanout_id:
+        _incr(FANOUT_KEY % (fanout_id, 'shards'), -1)
+        _check_complete(fanout_id)
+
+
+def record_delivered(counts: Dict[str, int]):
+    """Emails delivered (sent or finally failed) per fan-out id"""
+    for fanout_id, count in counts.items():
+        if fanout_id and count:
+            _incr(FANOUT_KEY % (fanout_id, 'pending'), -count)
+            _check_complete(fanout_id)
+
+
+def get_fanout_latency() -> Dict:
+    """
+    Detection-to-last-email latency of completed fan-outs
+    Returns: {'count': int, 'last_seconds': float, 'avg_seconds': float, 'max_seconds': float} or {}
+    """
+    try:
+        return cache.get(LATENCY_CACHE_KEY) or {}
+    except Exception as e:
+        logger.warning(f"Could not read fan-out latency: {e}")
+        return {}
+
+
+def _incr(key: str, delta: int):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Not tracked (expired or started before tracking existed)
+        pass
+    except Exception as e:
+        logger.warning(f"Could not update fan-out progress {key}: {e}")
+
+
+def _check_complete(fanout_id: str):
+    """Record the latency once every shard finished and every queued email was delivered"""
+    try:
+        values = cache.get_many([FANOUT_KEY % (fanout_id, name) for name in ('shards', 'pending', 'detected_at')])
+        shards = values.get(FANOUT_KEY % (fanout_id, 'shards'))
+        pending = values.get(FANOUT_KEY % (fanout_id, 'pending'))
+        detected_at: Optional[datetime] = values.get(FANOUT_KEY % (fanout_id, 'detected_at'))
+        if shards is None or pending is None or detected_at is None or shards > 0 or pending > 0:
+            return
+
+        # Only the first worker to see completion records it
+        if not cache.add(FANOUT_KEY % (fanout_id, 'done'), True, FANOUT_TTL):
+            return
+
+        seconds = (timezone.now() - detected_at).total_seconds()
+        metrics = cache.get(LATENCY_CACHE_KEY) or {'count': 0, 'avg_seconds': None, 'max_seconds': 0.0}
+        previous = metrics['avg_seconds']
+        metrics['count'] += 1
+        metrics['last_seconds'] = round(seconds, 3)
+        metrics['avg_seconds'] = round(seconds if previous is None else (
+            LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * previous
+        ), 3)
+        metrics['max_seconds'] = round(max(metrics['max_seconds'], seconds), 3)
+        cache.set(LATENCY_CACHE_KEY, metrics, None)
+
+        logger.info(f"Fan-out {fanout_id} complete: last email {seconds:.1f}s after detection")
+    except Exception as e:
+        logger.warning(f"Could not record fan-out latency for {fanout_id}: {e}")
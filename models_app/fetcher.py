@@ -0,0 +1,187 @@
+"""
+Concurrent HTTP fetch layer for the platform scrapers.
+Blocking requests calls are driven from asyncio on worker threads, sharing
+keep-alive connection pools per host and a concurrency limit per platform.
+"""
+import asyncio
+import ipaddress
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+CLIENT_IP_URL = 'https://api.ipify.org'
+CLIENT_IP_CACHE_KEY = 'scraper:client_ip'
+FALLBACK_CLIENT_IP = '8.8.8.8'
+CLIENT_IP_RETRY_SECONDS = 60
+
+# (method, url, requests kwargs)
+RequestSpec = Tuple[str, str, Dict]
+
+
+class HostSessionPool:
+    """Process-wide keep-alive sessions, one per scheme + host"""
+
+    def __init__(self, pool_size: int):
+        self.pool_size = pool_size
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> requests.Session:
+        """Get (or create) the pooled session for the host of `url`"""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    session.headers.update({'User-Agent': USER_AGENT})
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._sessions[key] = session
+        return session
+
+
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> HostSessionPool:
+    """Get the shared per-host session pool (created on first use)"""
+    global _session_pool
+    if _session_pool is None:
+        with _session_pool_lock:
+            if _session_pool is None:
+                _session_pool = HostSessionPool(int(getattr(settings, 'SCRAPE_HTTP_POOL_SIZE', 10)))
+    return _session_pool
+
+
+class AsyncFetcher:
+    """Run many HTTP requests concurrently with a bounded number in flight"""
+
+    def __init__(self, concurrency: int = None):
+        self.concurrency = concurrency or int(getattr(settings, 'SCRAPE_CONCURRENCY_PER_PLATFORM', 4))
+        self.pool = get_session_pool()
+
+    def request(self, method: str, url: str, **kwargs) -> Optional[requests.Response]:
+        """Blocking request through the pooled session for the host"""
+        kwargs.setdefault('timeout', 30)
+        try:
+            return self.pool.get(url).request(method, url, **kwargs)
+        except requests.RequestException as e:
+            logger.error(f"Request to {url} failed: {e}")
+            return None
+
+    async def fetch(self, semaphore: asyncio.Semaphore, spec: RequestSpec) -> Optional[requests.Response]:
+        """Fetch one request spec once a concurrency slot is free"""
+        method, url, kwargs = spec
+        async with semaphore:
+            return await asyncio.to_thread(self.request, method, url, **kwargs)
+
+    async def fetch_all_async(self, specs: List[RequestSpec]) -> List[Optional[requests.Response]]:
+        """Fetch all specs concurrently, preserving order"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self.fetch(semaphore, spec) for spec in specs))
+
+    def fetch_all(self, specs: List[RequestSpec]) -> List[Optional[requests.Response]]:
+        """Blocking entry point for Celery tasks: fetch all specs concurrently"""
+        if not specs:
+            return []
+        if len(specs) == 1:
+            method, url, kwargs = specs[0]
+            return [self.request(method, url, **kwargs)]
+        return asyncio.run(self.fetch_all_async(specs))
+
+
+class ClientIPResolver:
+    """
+    Process-wide cache of this server's egress IP (sent to Chaturbate as client_ip).
+    Backed by Redis so all workers share one lookup; refreshes happen on a
+    background thread so scrapes never wait on ipify.
+    """
+
+    def __init__(self):
+        self._ip = None
+        self._expires_at = 0.0
+        self._retry_after = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def ttl(self) -> int:
+        return int(getattr(settings, 'SCRAPE_CLIENT_IP_TTL', 3600))
+
+    def get(self) -> str:
+        """Return the cached IP, the last known one while refreshing, or the fallback"""
+        if self._ip and time.monotonic() < self._expires_at:
+            return self._ip
+
+        try:
+            cached_ip = cache.get(CLIENT_IP_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read cached client IP: {e}")
+            cached_ip = None
+
+        if cached_ip:
+            self._remember(cached_ip)
+            return cached_ip
+
+        self.refresh_in_background()
+        return self._ip or FALLBACK_CLIENT_IP
+
+    def refresh_in_background(self):
+        """Start a lookup thread unless one is already running"""
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._retry_after:
+                return
+            self._refreshing = True
+
+        threading.Thread(target=self.refresh, name='client-ip-refresh', daemon=True).start()
+
+    def refresh(self) -> Optional[str]:
+        """Look up the egress IP and store it locally and in Redis"""
+        try:
+            response = get_session_pool().get(CLIENT_IP_URL).get(CLIENT_IP_URL, timeout=5)
+            ip = str(ipaddress.ip_address(response.text.strip()))
+        except Exception as e:
+            logger.warning(f"Client IP lookup failed: {e}")
+            self._retry_after = time.monotonic() + CLIENT_IP_RETRY_SECONDS
+            return None
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+        self._remember(ip)
+        try:
+            cache.set(CLIENT_IP_CACHE_KEY, ip, self.ttl)
+        except Exception as e:
+            logger.warning(f"Could not cache client IP: {e}")
+
+        logger.info(f"Resolved client IP: {ip}")
+        return ip
+
+    def _remember(self, ip: str):
+        self._ip = ip
+        self._expires_at = time.monotonic() + self.ttl
+
+
+_client_ip_resolver = ClientIPResolver()
+
+
+def get_client_ip() -> str:
+    """Egress IP for Chaturbate requests (never blocks on the network)"""
+    return _client_ip_resolver.get()
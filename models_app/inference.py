@@ -0,0 +1,187 @@
+"""
+Resident NudeNet inference server.
+One long-lived process holds the ONNX model and serves Celery workers over a
+local socket, micro-batching requests that arrive close together so the model
+is loaded once and memory stays flat however many workers run.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from typing import List, Optional, Tuple, Union
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+# Seconds a worker waits for predictions before giving up on the server
+REQUEST_TIMEOUT = 120
+
+
+def parse_address(address: str) -> Address:
+    """'host:port' is a TCP address, anything else is a unix socket path"""
+    host, sep, port = address.rpartition(':')
+    if sep and not address.startswith('/') and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def get_server_address() -> Optional[Address]:
+    """Address of the inference server from NUDITY_INFERENCE_SERVER, or None when disabled"""
+    address = getattr(settings, 'NUDITY_INFERENCE_SERVER', '')
+    return parse_address(address) if address else None
+
+
+def get_authkey() -> bytes:
+    """Shared secret clients use to authenticate with the server"""
+    return getattr(settings, 'NUDITY_INFERENCE_AUTHKEY', settings.SECRET_KEY).encode()
+
+
+class InferenceJob:
+    """Images submitted by one client request, waiting for predictions"""
+
+    def __init__(self, images: List):
+        self.images = images
+        self.predictions = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceServer:
+    """Accept client connections and run their images through one shared detector"""
+
+    def __init__(self, address: Address, batch_size: int = None, max_wait: float = None):
+        self.address = address
+        self.batch_size = batch_size or int(getattr(settings, 'NUDITY_BATCH_SIZE', 8))
+        self.max_wait = max_wait if max_wait is not None else (
+            int(getattr(settings, 'NUDITY_INFERENCE_MAX_WAIT_MS', 20)) / 1000
+        )
+        self.jobs = queue.Queue()
+        self.detector = None
+
+    def serve_forever(self):
+        """Load the model, then accept connections until interrupted"""
+        from nudenet import NudeDetector
+
+        started = time.perf_counter()
+        self.detector = NudeDetector()
+        logger.info(f"NudeNet model loaded in {time.perf_counter() - started:.2f}s")
+
+        threading.Thread(target=self.run_batches, name='inference-batcher', daemon=True).start()
+
+        # A socket file left by a crashed server would make bind() fail
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+        with Listener(self.address, authkey=get_authkey()) as listener:
+            logger.info(f"Inference server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Failed handshakes (bad authkey, dropped clients) shouldn't stop the server
+                    logger.warning(f"Rejected inference client: {e}")
+                    continue
+                threading.Thread(target=self.handle_client, args=(conn,), daemon=True).start()
+
+    def handle_client(self, conn):
+        """Answer one client's requests until it disconnects"""
+        with conn:
+            while True:
+                try:
+                    images = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                job = InferenceJob(images)
+                self.jobs.put(job)
+                job.done.wait()
+
+                try:
+                    conn.send({'error': job.error} if job.error else {'predictions': job.predictions})
+                except (EOFError, OSError):
+                    return
+
+    def next_batch(self) -> List[InferenceJob]:
+        """Block for one job, then gather more until the batch is full or max_wait passes"""
+        jobs = [self.jobs.get()]
+        size = len(jobs[0].images)
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self.jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job.images)
+        return jobs
+
+    def run_batches(self):
+        """Inference loop: one forward pass per micro-batch, results split back per job"""
+        while True:
+            jobs = self.next_batch()
+            images = [image for job in jobs for image in job.images]
+
+            try:
+                started = time.perf_counter()
+                predictions = self.detector.detect_batch(images, batch_size=self.batch_size)
+                logger.info(
+                    f"Inference: {len(images)} images from {len(jobs)} requests "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+            except Exception as e:
+                # One unreadable image fails the whole pass, so retry each job on its own
+                logger.warning(f"Micro-batch failed ({e}), running requests separately")
+                for job in jobs:
+                    self.run_job(job)
+                continue
+
+            offset = 0
+            for job in jobs:
+                job.predictions = predictions[offset:offset + len(job.images)]
+                offset += len(job.images)
+                job.done.set()
+
+    def run_job(self, job: InferenceJob):
+        try:
+            job.predictions = self.detector.detect_batch(job.images, batch_size=self.batch_size)
+        except Exception as e:
+            job.error = str(e)
+        job.done.set()
+
+
+class InferenceClient:
+    """Submit images to the inference server from a worker process"""
+
+    def __init__(self, address: Address):
+        self.address = address
+
+    def detect_batch(self, images: List) -> List[List[dict]]:
+        """
+        Raw NudeNet predictions for each image.
+        Raises OSError/EOFError if the server can't be reached, TimeoutError
+        if it doesn't answer in time and RuntimeError if inference failed.
+        """
+        with Client(self.address, authkey=get_authkey()) as conn:
+            conn.send(list(images))
+            if not conn.poll(REQUEST_TIMEOUT):
+                raise TimeoutError(f"No response from inference server in {REQUEST_TIMEOUT}s")
+            response = conn.recv()
+
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['predictions']
+
+
+def get_inference_client() -> Optional[InferenceClient]:
+    """Client for the configured inference server, or None to run the model in-process"""
+    address = get_server_address()
+    return InferenceClient(address) if address else None
@@ -0,0 +1,202 @@
+"""
+Management command to benchmark the NudeNet detector on local sample images.
+Usage: python manage.py benchmark_nudity_detector <directory> [--batch-size 8] [--threads 2] [--repeat 3] [--output bench.json]
+Reports per-stage timings, images/sec, model load time and peak RSS, and writes them as JSON.
+"""
+import json
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+import onnxruntime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from nudenet import NudeDetector
+from nudenet import nudenet as nudenet_internals
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+STAGES = ('decode', 'preprocess', 'inference', 'postprocess')
+MODEL_PATH = os.path.join(os.path.dirname(nudenet_internals.__file__), '320n.onnx')
+
+
+class ThreadedNudeDetector(NudeDetector):
+    """NudeDetector whose ONNX Runtime session uses a fixed number of threads"""
+
+    def __init__(self, threads, inference_resolution=320):
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.onnx_session = onnxruntime.InferenceSession(MODEL_PATH, options)
+        self.input_width = inference_resolution
+        self.input_height = inference_resolution
+        self.input_name = self.onnx_session.get_inputs()[0].name
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = 'Benchmark nudity detection cost per image on a directory of sample images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            type=str,
+            help='Directory of sample images'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Images per forward pass (default: NUDITY_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=0,
+            help='ONNX Runtime intra-op threads (default: 0, runtime default)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Passes over the image set after one warm-up pass (default: 3)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the JSON report to this file instead of stdout'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or int(getattr(settings, 'NUDITY_BATCH_SIZE', 8))
+        threads = options['threads']
+        repeat = max(options['repeat'], 1)
+
+        # Read files up front so disk IO isn't counted as decode time
+        contents = self.load_images(options['directory'])
+        if not contents:
+            raise CommandError(f"No images found in {options['directory']}")
+
+        rss_before_load = peak_rss_mb()
+        started = time.perf_counter()
+        detector = ThreadedNudeDetector(threads) if threads else NudeDetector()
+        load_seconds = time.perf_counter() - started
+        rss_after_load = peak_rss_mb()
+
+        self.stdout.write(
+            f"Loaded model in {load_seconds:.2f}s; benchmarking {len(contents)} images, "
+            f"batch size {batch_size}, {repeat} passes..."
+        )
+
+        # Warm-up pass (first runs allocate buffers and are not representative)
+        self.run_pass(detector, contents, batch_size, defaultdict(float))
+
+        timings = defaultdict(float)
+        images = 0
+        for _ in range(repeat):
+            images += self.run_pass(detector, contents, batch_size, timings)
+        if not images:
+            raise CommandError(f"None of the images in {options['directory']} could be decoded")
+
+        total_seconds = sum(timings.values())
+        images_per_second = images / total_seconds if total_seconds else 0.0
+
+        # Inference-only upper bound for one scheduler cycle (downloads and DB writes add to this)
+        cycle_seconds = int(getattr(settings, 'NUDITY_CHECK_CYCLE_SECONDS', 300))
+        share = float(getattr(settings, 'NUDITY_CHECK_WORKER_SHARE', 0.5))
+        max_checks = int(images_per_second * cycle_seconds * share)
+        report = {
+            'timestamp': timezone.now().isoformat(),
+            'directory': os.path.abspath(options['directory']),
+            'images': len(contents),
+            'decoded_images': images // repeat,
+            'passes': repeat,
+            'batch_size': batch_size,
+            'onnx_threads': threads,
+            'model_load_seconds': round(load_seconds, 4),
+            'stages': {
+                name: {
+                    'total_seconds': round(timings[name], 4),
+                    'ms_per_image': round(timings[name] * 1000 / images, 3),
+                    'share': round(timings[name] / total_seconds, 4) if total_seconds else 0.0,
+                }
+                for name in STAGES
+            },
+            'images_per_second': round(images_per_second, 2),
+            'max_checks_per_cycle_per_worker': max_checks,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'model_load_rss_mb': round(rss_after_load - rss_before_load, 1),
+            'versions': {
+                'onnxruntime': onnxruntime.__version__,
+                'opencv': cv2.__version__,
+                'numpy': np.__version__,
+            },
+        }
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {report['images_per_second']} images/sec (up to {max_checks} checks per cycle per worker), "
+                f"peak RSS {report['peak_rss_mb']} MB "
+                f"- report written to {options['output']}"
+            ))
+        else:
+            self.stdout.write(output)
+
+    def load_images(self, directory):
+        """Raw bytes of every image file in the directory"""
+        if not os.path.isdir(directory):
+            raise CommandError(f"{directory} is not a directory")
+
+        contents = []
+        for filename in sorted(os.listdir(directory)):
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                with open(os.path.join(directory, filename), 'rb') as f:
+                    contents.append(f.read())
+        return contents
+
+    def run_pass(self, detector, contents, batch_size, timings):
+        """
+        Run every image through the detector stage by stage, adding each stage's time
+        Returns: number of images processed (undecodable files are skipped)
+        """
+        processed = 0
+        for i in range(0, len(contents), batch_size):
+            batch = contents[i:i + batch_size]
+
+            started = time.perf_counter()
+            frames = [cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR) for content in batch]
+            frames = [frame for frame in frames if frame is not None]
+            timings['decode'] += time.perf_counter() - started
+            if not frames:
+                continue
+            processed += len(frames)
+
+            started = time.perf_counter()
+            preprocessed = [nudenet_internals._read_image(frame, detector.input_width) for frame in frames]
+            batch_input = np.vstack([blob for blob, *_ in preprocessed])
+            timings['preprocess'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            outputs = detector.onnx_session.run(None, {detector.input_name: batch_input})
+            timings['inference'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            for j, (_, x_ratio, y_ratio, x_pad, y_pad, width, height) in enumerate(preprocessed):
+                nudenet_internals._postprocess(
+                    [outputs[0][j:j + 1]], x_pad, y_pad, x_ratio, y_ratio,
+                    width, height, detector.input_width, detector.input_height
+                )
+            timings['postprocess'] += time.perf_counter() - started
+
+        return processed
@@ -0,0 +1,98 @@
+"""
+Management command to evaluate the skin-ratio pre-filter on a labelled local image set.
+Usage: python manage.py evaluate_nudity_prefilter <directory> [--min-skin-ratio 0.02] [--size 64] [--sweep]
+The directory must contain nude/ and safe/ subfolders of images.
+"""
+import os
+
+import cv2
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from models_app.nudity_detector import NudityDetectionService
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+LABELS = ('nude', 'safe')
+SWEEP_RATIOS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.08, 0.1, 0.15, 0.2)
+
+
+class Command(BaseCommand):
+    help = 'Report skip rate and recall lost by the nudity pre-filter on labelled images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory',
+            type=str,
+            help='Directory with nude/ and safe/ subfolders'
+        )
+        parser.add_argument(
+            '--min-skin-ratio',
+            type=float,
+            help='Skin ratio below which frames are skipped (default: NUDITY_PREFILTER_MIN_SKIN_RATIO)'
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            help='Longest side of the downscaled frame (default: NUDITY_PREFILTER_SIZE)'
+        )
+        parser.add_argument(
+            '--sweep',
+            action='store_true',
+            help='Also report a range of thresholds'
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        threshold = options['min_skin_ratio']
+        if threshold is None:
+            threshold = float(getattr(settings, 'NUDITY_PREFILTER_MIN_SKIN_RATIO', 0.02))
+
+        ratios = {label: self.load_ratios(os.path.join(directory, label), options['size']) for label in LABELS}
+        if not ratios['nude'] or not ratios['safe']:
+            raise CommandError(f"Need images in both {directory}/nude and {directory}/safe")
+
+        self.stdout.write(
+            f"{len(ratios['nude'])} nude and {len(ratios['safe'])} safe images, "
+            f"frame size {options['size'] or getattr(settings, 'NUDITY_PREFILTER_SIZE', 64)}px"
+        )
+
+        thresholds = sorted(set(SWEEP_RATIOS) | {threshold}) if options['sweep'] else [threshold]
+        self.stdout.write(f"{'min_skin_ratio':>15} {'skip_rate':>10} {'safe_skipped':>13} {'recall_lost':>12}")
+        for value in thresholds:
+            report = self.evaluate(ratios, value)
+            line = (
+                f"{value:>15.3f} {report['skip_rate']:>10.1%} "
+                f"{report['safe_skipped']:>13.1%} {report['recall_lost']:>12.1%}"
+            )
+            self.stdout.write(self.style.SUCCESS(line) if value == threshold else line)
+
+    def load_ratios(self, folder, size):
+        """Skin ratio of every readable image in a folder"""
+        if not os.path.isdir(folder):
+            return []
+
+        ratios = []
+        for filename in sorted(os.listdir(folder)):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_COLOR)
+            if image is None:
+                self.stderr.write(f"Skipping unreadable image {filename}")
+                continue
+            ratios.append(NudityDetectionService.skin_ratio(image, size=size))
+        return ratios
+
+    @staticmethod
+    def evaluate(ratios, threshold):
+        """
+        skip_rate: share of all frames the pre-filter keeps from NudeNet
+        safe_skipped: share of safe frames skipped (the saving)
+        recall_lost: share of nude frames wrongly skipped (missed alerts)
+        """
+        nude_skipped = sum(ratio < threshold for ratio in ratios['nude'])
+        safe_skipped = sum(ratio < threshold for ratio in ratios['safe'])
+        total = len(ratios['nude']) + len(ratios['safe'])
+        return {
+            'skip_rate': (nude_skipped + safe_skipped) / total,
+            'safe_skipped': safe_skipped / len(ratios['safe']),
+            'recall_lost': nude_skipped / len(ratios['nude']),
+        }
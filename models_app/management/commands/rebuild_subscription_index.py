@@ -0,0 +1,29 @@
+"""
+Management command to rebuild the Redis index of active subscriptions.
+Usage: python manage.py rebuild_subscription_index [--batch-size 5000]
+Run once after deploying the index, and whenever Redis lost its data.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from models_app import subscription_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the Redis index of active subscriptions per model from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Subscriptions read and written per round trip (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = subscription_index.rebuild(batch_size=options['batch_size'])
+        except Exception as e:
+            raise CommandError(f"Could not rebuild subscription index: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Indexed {result['subscriptions']} subscriptions across {result['models']} models"
+        ))
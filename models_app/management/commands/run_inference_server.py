@@ -0,0 +1,42 @@
+"""
+Management command to run the resident NudeNet inference server.
+Usage: python manage.py run_inference_server [--address /path/to.sock] [--batch-size 8] [--max-wait-ms 20]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from models_app.inference import InferenceServer, get_server_address, parse_address
+
+
+class Command(BaseCommand):
+    help = 'Run the nudity detector as a long-lived inference server for Celery workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--address',
+            type=str,
+            help="'host:port' or unix socket path (default: NUDITY_INFERENCE_SERVER)"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Max images per forward pass (default: NUDITY_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-wait-ms',
+            type=int,
+            help='Milliseconds to wait for a batch to fill (default: NUDITY_INFERENCE_MAX_WAIT_MS)'
+        )
+
+    def handle(self, *args, **options):
+        address = parse_address(options['address']) if options['address'] else get_server_address()
+
+        if not address:
+            raise CommandError('No address given and NUDITY_INFERENCE_SERVER is not set')
+
+        max_wait = options['max_wait_ms'] / 1000 if options['max_wait_ms'] is not None else None
+        server = InferenceServer(address, batch_size=options['batch_size'], max_wait=max_wait)
+
+        self.stdout.write(f"Starting inference server on {address}...")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS('✓ Inference server stopped'))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("models_app", "0004_add_twitter_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webcammodel",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("models_app", "0005_webcammodel_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModelStatusEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=12)),
+                ("is_online", models.BooleanField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "model",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_events",
+                        to="models_app.webcammodel",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "model_status_events",
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="model_statu_created_84fb30_idx"
+                    ),
+                    models.Index(
+                        fields=["model", "created_at"],
+                        name="model_statu_model_i_5f7f19_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("models_app", "0006_modelstatusevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webcammodel",
+            name="nudity_phash",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("models_app", "0007_webcammodel_nudity_phash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webcammodel",
+            name="nudity_check_interval",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="webcammodel",
+            name="nudity_next_check",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("models_app", "0008_webcammodel_nudity_backoff"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["status", "next_attempt_at"],
+                name="notificatio_status_55722f_idx",
+            ),
+        ),
+    ]
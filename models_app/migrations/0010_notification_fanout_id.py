@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("models_app", "0009_notification_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="fanout_id",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
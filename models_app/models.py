@@ -22,12 +22,16 @@ class WebcamModel(models.Model):
     chat_url = models.TextField(null=True, blank=True)
     source = models.CharField(max_length=12)
     json_data = models.JSONField()
+    content_hash = models.CharField(max_length=32, null=True, blank=True)
 
     # Nudity detection fields
     is_naked = models.BooleanField(default=False)
     nudity_confidence = models.FloatField(null=True, blank=True)
     nudity_last_check = models.DateTimeField(null=True, blank=True)
     nudity_image_hash = models.CharField(max_length=64, null=True, blank=True)
+    nudity_phash = models.CharField(max_length=16, null=True, blank=True)
+    nudity_check_interval = models.PositiveIntegerField(null=True, blank=True)  # seconds
+    nudity_next_check = models.DateTimeField(null=True, blank=True)
 
     # Twitter bot tracking
     is_popular = models.BooleanField(default=False)
@@ -72,6 +76,25 @@ class ModelCategory(models.Model):
         unique_together = ['model', 'category']
 
 
+class ModelStatusEvent(models.Model):
+    """Append-only log of models going online or offline, written by the scrapers"""
+
+    model = models.ForeignKey(WebcamModel, on_delete=models.CASCADE, related_name='status_events')
+    source = models.CharField(max_length=12)
+    is_online = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'model_status_events'
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['model', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_id} {'online' if self.is_online else 'offline'} at {self.created_at}"
+
+
 class Favourite(models.Model):
     """User favourites for webcam models"""
 
@@ -160,6 +183,11 @@ class Notification(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
     sent_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(null=True, blank=True)
+    # Outbox delivery: attempts so far, and when the row may next be claimed (retry backoff or lease)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Fan-out that queued this notification, for detection-to-delivery latency tracking
+    fanout_id = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -167,6 +195,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['subscription']),
+            models.Index(fields=['status', 'next_attempt_at']),
         ]
 
     def __str__(self):
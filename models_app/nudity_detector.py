@@ -1,30 +1,78 @@
 """
 Nudity Detection Service using NudeNet AI
-Detects nudity in webcam model images for subscription notifications
+Detects nudity in webcam model images for subscription notifications.
+Snapshots are downloaded, decoded and checked entirely in memory.
 """
-import os
 import hashlib
 import requests
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+import cv2
+import numpy as np
+from PIL import Image
 from django.conf import settings
+from django.core.cache import cache
 from nudenet import NudeDetector
+from .fetcher import get_session_pool
+from .inference import get_inference_client
 
 logger = logging.getLogger(__name__)
 
+# Classes that indicate explicit nudity
+EXPLICIT_CLASSES = [
+    'FEMALE_BREAST_EXPOSED',
+    'FEMALE_GENITALIA_EXPOSED',
+    'MALE_GENITALIA_EXPOSED',
+    'BUTTOCKS_EXPOSED',
+    'ANUS_EXPOSED',
+]
+
+# Minimum detection score counted as nudity
+NUDITY_SCORE_THRESHOLD = 0.6
+
+# Skin tone bounds in YCrCb used by the pre-filter (inclusive)
+SKIN_CR_RANGE = (133, 173)
+SKIN_CB_RANGE = (77, 127)
+
+# Shared verdict cache keyed by image hash, and its hit/miss counters
+RESULT_CACHE_KEY = 'nudity:result:%s'
+CACHE_STATS_KEY = 'nudity:result_cache:%s'
+
+
+_download_executor = None
+_download_executor_lock = threading.Lock()
+
+
+def get_download_executor():
+    """Process-wide thread pool for snapshot downloads (created on first use)"""
+    global _download_executor
+    if _download_executor is None:
+        with _download_executor_lock:
+            if _download_executor is None:
+                _download_executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, 'NUDITY_DOWNLOAD_CONCURRENCY', 8)),
+                    thread_name_prefix='snapshot-download'
+                )
+    return _download_executor
+
 
 class NudityDetectionService:
     """Service for detecting nudity in images using NudeNet AI"""
 
+    # How each image in a batch check was resolved
+    RESULT_UNCHANGED = 'unchanged'
+    RESULT_SIMILAR = 'similar'
+    RESULT_CACHED = 'cached'
+    RESULT_PREFILTERED = 'prefiltered'
+    RESULT_DETECTED = 'detected'
+    RESULT_FAILED = 'failed'
+
     # Class-level detector (shared across instances for memory efficiency)
     _detector = None
     _detector_loaded = False
 
-    def __init__(self):
-        """Initialize the service (lazy load detector only when needed)"""
-        # Create cache directory for temporary image storage
-        self.cache_dir = os.path.join(settings.BASE_DIR, 'media', 'nudity_cache')
-        os.makedirs(self.cache_dir, exist_ok=True)
-
     @classmethod
     def _get_detector(cls):
         """Lazy load NudeNet detector (only once, shared across all instances)"""
@@ -47,29 +95,39 @@ class NudityDetectionService:
 
     def download_image(self, image_url):
         """
-        Download image from URL and save to cache
-        Returns: (cache_path, image_hash) or (None, None) on error
+        Download image from URL into memory over the shared keep-alive session for its host.
+        Snapshots larger than NUDITY_MAX_IMAGE_BYTES are abandoned.
+        Returns: (content: bytes, image_hash) or (None, None) on error
         """
+        max_bytes = int(getattr(settings, 'NUDITY_MAX_IMAGE_BYTES', 5 * 1024 * 1024))
+
         try:
             # Download image
-            response = requests.get(image_url, timeout=10, headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
-
-            if response.status_code != 200:
-                logger.error(f"Failed to download image: HTTP {response.status_code}")
-                return None, None
+            session = get_session_pool().get(image_url)
+            with session.get(image_url, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    logger.error(f"Failed to download image: HTTP {response.status_code}")
+                    return None, None
+
+                if int(response.headers.get('Content-Length') or 0) > max_bytes:
+                    logger.warning(f"Image too large, skipping: {image_url}")
+                    return None, None
+
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        logger.warning(f"Image too large, skipping: {image_url}")
+                        return None, None
+                    chunks.append(chunk)
+                content = b''.join(chunks)
 
             # Generate hash for caching and duplicate detection
-            image_hash = hashlib.md5(response.content).hexdigest()
-            cache_path = os.path.join(self.cache_dir, f"{image_hash}.jpg")
-
-            # Save to cache
-            with open(cache_path, 'wb') as f:
-                f.write(response.content)
+            image_hash = hashlib.md5(content).hexdigest()
 
             logger.info(f"Image downloaded successfully: {image_hash}")
-            return cache_path, image_hash
+            return content, image_hash
 
         except requests.RequestException as e:
             logger.error(f"Error downloading image {image_url}: {e}")
@@ -78,76 +136,240 @@ class NudityDetectionService:
             logger.error(f"Unexpected error downloading image: {e}")
             return None, None
 
-    def detect_nudity(self, image_path):
+    def start_downloads(self, image_urls):
+        """
+        Start downloading snapshots in the background (e.g. the next batch while
+        this one runs inference). Pass the result to collect_downloads.
+        Returns: (deadline, futures)
+        """
+        budget = float(getattr(settings, 'NUDITY_DOWNLOAD_BUDGET_SECONDS', 20))
+        executor = get_download_executor()
+        return time.monotonic() + budget, [executor.submit(self.download_image, url) for url in image_urls]
+
+    def collect_downloads(self, pending):
+        """
+        Wait for downloads started by start_downloads, up to their time budget
+        Returns: list of (content, image_hash), (None, None) for failed or late downloads
+        """
+        deadline, futures = pending
+        wait(futures, timeout=max(deadline - time.monotonic(), 0))
+
+        late = sum(not future.done() for future in futures)
+        if late:
+            logger.warning(f"{late} snapshot downloads exceeded the time budget")
+
+        downloads = []
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                downloads.append(future.result())
+            else:
+                future.cancel()
+                downloads.append((None, None))
+        return downloads
+
+    def download_images(self, image_urls):
+        """Download snapshots concurrently; see collect_downloads for the return value"""
+        return self.collect_downloads(self.start_downloads(image_urls))
+
+    @staticmethod
+    def decode_image(content):
+        """
+        Decode image bytes in memory into a BGR array (the layout NudeNet expects).
+        np.frombuffer wraps the response buffer without copying it.
+        Returns None if the bytes aren't a decodable image.
+        """
+        try:
+            image = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR)
+        except Exception as e:
+            logger.warning(f"Could not decode image: {e}")
+            return None
+
+        if image is None:
+            logger.warning("Could not decode image: unsupported or corrupt data")
+        return image
+
+    def detect_nudity(self, image):
         """
         Detect nudity in image using NudeNet
+        image: decoded BGR array, raw image bytes or a file path
         Returns: (is_naked: bool, confidence: float, details: dict)
         """
+        try:
+            predictions = self.detect_remote([image])
+        except RuntimeError as e:
+            logger.error(f"Inference server could not check image: {e}")
+            return False, 0.0, {'error': str(e)}
+        if predictions is not None:
+            return self.evaluate_predictions(predictions[0])
+        if not self.use_local_detector():
+            return False, 0.0, {'error': 'Inference server unavailable'}
+
         if not self.detector:
             logger.error("NudeNet detector not initialized")
             return False, 0.0, {'error': 'Detector not initialized'}
 
         try:
             # Run detection
-            predictions = self.detector.detect(image_path)
-
-            # Classes that indicate explicit nudity
-            explicit_classes = [
-                'FEMALE_BREAST_EXPOSED',
-                'FEMALE_GENITALIA_EXPOSED',
-                'MALE_GENITALIA_EXPOSED',
-                'BUTTOCKS_EXPOSED',
-                'ANUS_EXPOSED',
-            ]
-
-            # Filter predictions for explicit nudity (confidence > 0.6)
-            nudity_detections = [
-                p for p in predictions
-                if p['class'] in explicit_classes and p['score'] > 0.6
-            ]
-
-            if nudity_detections:
-                # Get highest confidence score
-                max_confidence = max(d['score'] for d in nudity_detections)
-                is_naked = True
-                classes_found = list(set(d['class'] for d in nudity_detections))
-            else:
-                max_confidence = 0.0
-                is_naked = False
-                classes_found = []
+            predictions = self.detector.detect(image)
+            return self.evaluate_predictions(predictions)
 
-            details = {
-                'detections_count': len(nudity_detections),
-                'classes_found': classes_found,
-                'total_predictions': len(predictions),
-            }
+        except Exception as e:
+            logger.error(f"Error detecting nudity: {e}", exc_info=True)
+            return False, 0.0, {'error': str(e)}
 
-            logger.info(
-                f"Nudity detection complete: is_naked={is_naked}, "
-                f"confidence={max_confidence:.2f}, classes={classes_found}"
+    def detect_nudity_batch(self, images):
+        """
+        Detect nudity in several images with batched NudeNet inference
+        images: decoded BGR arrays, raw image bytes or file paths
+        Returns: list of (is_naked: bool, confidence: float, details: dict), one per image
+        """
+        if not images:
+            return []
+
+        try:
+            predictions = self.detect_remote(images)
+        except RuntimeError as e:
+            logger.warning(f"Inference server batch failed ({e}), falling back to single-image requests")
+            return [self.detect_nudity(image) for image in images]
+        if predictions is not None:
+            return [self.evaluate_predictions(image_predictions) for image_predictions in predictions]
+        if not self.use_local_detector():
+            return [(False, 0.0, {'error': 'Inference server unavailable'}) for _ in images]
+
+        if not self.detector:
+            logger.error("NudeNet detector not initialized")
+            return [(False, 0.0, {'error': 'Detector not initialized'}) for _ in images]
+
+        batch_size = int(getattr(settings, 'NUDITY_BATCH_SIZE', 8))
+
+        try:
+            # Preprocess the images together and run one forward pass per batch
+            batch_predictions = self.detector.detect_batch(images, batch_size=batch_size)
+            return [self.evaluate_predictions(predictions) for predictions in batch_predictions]
+
+        except Exception as e:
+            # One unreadable image fails the whole batch, so retry them one at a time
+            logger.warning(f"Batch detection failed ({e}), falling back to single-image detection")
+            return [self.detect_nudity(image) for image in images]
+
+    @staticmethod
+    def detect_remote(images):
+        """
+        Run images through the resident inference server when one is configured
+        Returns: raw NudeNet predictions per image, or None to use the in-process model
+        Raises RuntimeError if the server was reached but inference failed
+        """
+        client = get_inference_client()
+        if client is None:
+            return None
+
+        try:
+            return client.detect_batch(images)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            logger.warning(f"Inference server unreachable: {e}")
+            return None
+
+    @staticmethod
+    def use_local_detector():
+        """Whether to load the model in this process (no server, or fallback allowed)"""
+        if get_inference_client() is None:
+            return True
+        return getattr(settings, 'NUDITY_INFERENCE_LOCAL_FALLBACK', True)
+
+    def evaluate_predictions(self, predictions):
+        """
+        Turn raw NudeNet predictions into a verdict
+        Returns: (is_naked: bool, confidence: float, details: dict)
+        """
+        # Filter predictions for explicit nudity (confidence > 0.6)
+        nudity_detections = [
+            p for p in predictions
+            if p['class'] in EXPLICIT_CLASSES and p['score'] > NUDITY_SCORE_THRESHOLD
+        ]
+
+        if nudity_detections:
+            # Get highest confidence score
+            max_confidence = max(d['score'] for d in nudity_detections)
+            is_naked = True
+            classes_found = list(set(d['class'] for d in nudity_detections))
+        else:
+            max_confidence = 0.0
+            is_naked = False
+            classes_found = []
+
+        details = {
+            'detections_count': len(nudity_detections),
+            'classes_found': classes_found,
+            'total_predictions': len(predictions),
+        }
+
+        logger.info(
+            f"Nudity detection complete: is_naked={is_naked}, "
+            f"confidence={max_confidence:.2f}, classes={classes_found}"
+        )
+
+        return is_naked, max_confidence, details
+
+    @staticmethod
+    def skin_ratio(image, size=None):
+        """
+        Fraction of skin-toned pixels in a decoded BGR frame, measured on a
+        copy downscaled so its longest side is `size` (NUDITY_PREFILTER_SIZE) pixels
+        """
+        size = size or int(getattr(settings, 'NUDITY_PREFILTER_SIZE', 64))
+        height, width = image.shape[:2]
+        scale = size / max(height, width)
+        if scale < 1:
+            image = cv2.resize(
+                image, (max(int(width * scale), 1), max(int(height * scale), 1)),
+                interpolation=cv2.INTER_AREA
             )
 
-            return is_naked, max_confidence, details
+        ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+        cr, cb = ycrcb[..., 1], ycrcb[..., 2]
+        skin = (
+            (cr >= SKIN_CR_RANGE[0]) & (cr <= SKIN_CR_RANGE[1]) &
+            (cb >= SKIN_CB_RANGE[0]) & (cb <= SKIN_CB_RANGE[1])
+        )
+        return float(skin.mean())
 
+    def prefilter(self, image):
+        """
+        First stage of the cascade: True if the frame shows too little skin to be nude,
+        so NudeNet can be skipped. Ambiguous frames return False and go to the model.
+        """
+        if not getattr(settings, 'NUDITY_PREFILTER_ENABLED', True):
+            return False
+
+        try:
+            ratio = self.skin_ratio(image)
         except Exception as e:
-            logger.error(f"Error detecting nudity in {image_path}: {e}", exc_info=True)
-            return False, 0.0, {'error': str(e)}
+            logger.warning(f"Pre-filter failed, sending frame to detector: {e}")
+            return False
+
+        return ratio < float(getattr(settings, 'NUDITY_PREFILTER_MIN_SKIN_RATIO', 0.02))
 
     def check_model_image(self, image_url):
         """
-        Complete workflow: download image, check nudity, cleanup
+        Complete workflow: download image, check nudity (in memory)
         Returns: (is_naked: bool, confidence: float, image_hash: str)
         """
         # Download image
-        image_path, image_hash = self.download_image(image_url)
+        content, image_hash = self.download_image(image_url)
 
-        if not image_path:
+        if content is None:
             logger.warning(f"Failed to download image from {image_url}")
             return False, 0.0, None
 
         try:
+            image = self.decode_image(content)
+            if image is None:
+                return False, 0.0, image_hash
+
             # Detect nudity
-            is_naked, confidence, details = self.detect_nudity(image_path)
+            is_naked, confidence, details = self.detect_nudity(image)
 
             logger.info(
                 f"Image check complete: is_naked={is_naked}, confidence={confidence:.2f}, "
@@ -160,41 +382,214 @@ class NudityDetectionService:
             logger.error(f"Error in check_model_image: {e}", exc_info=True)
             return False, 0.0, image_hash
 
-        finally:
-            # Always cleanup image file (privacy & disk space)
-            try:
-                if image_path and os.path.exists(image_path):
-                    os.remove(image_path)
-                    logger.debug(f"Cleaned up image: {image_path}")
-            except Exception as e:
-                logger.warning(f"Failed to delete cached image {image_path}: {e}")
-
-    def cleanup_old_cache(self, max_age_hours=1):
+    def check_model_images(self, image_urls, known_hashes=None, known_phashes=None, downloads=None):
         """
-        Remove cached images older than max_age_hours
-        Should be called periodically via Celery task
+        Batch workflow: download all images, then resolve each one hash-first:
+        unchanged since the last check, visually near-identical to the last
+        checked frame, found in the shared result cache, rejected by the cheap
+        skin pre-filter, or run through one batched detector pass. Nothing is
+        written to disk.
+        known_hashes: image hash from the previous check of each URL (or None)
+        known_phashes: perceptual hash of the last checked frame of each URL (or None)
+        downloads: already fetched (content, image_hash) per URL, e.g. prefetched
+                   with start_downloads; downloaded concurrently here if omitted
+        Returns: list of dicts, one per URL, with keys
+                 status, is_naked, confidence, image_hash, phash
         """
-        import time
-        removed_count = 0
+        known_hashes = known_hashes or [None] * len(image_urls)
+        known_phashes = known_phashes or [None] * len(image_urls)
+        max_distance = int(getattr(settings, 'NUDITY_PHASH_MAX_DISTANCE', 6))
+        results = [self._result(self.RESULT_FAILED) for _ in image_urls]
+
+        try:
+            if downloads is None:
+                downloads = self.download_images(image_urls)
+
+            downloaded = []
+            for idx, (image_url, (content, image_hash)) in enumerate(zip(image_urls, downloads)):
+                if content is not None:
+                    downloaded.append((idx, content, image_hash))
+                else:
+                    logger.warning(f"Failed to download image from {image_url}")
+
+            # Hash-first: skip images identical to the last check (no decoding needed)
+            changed = []
+            for idx, content, image_hash in downloaded:
+                if known_hashes[idx] == image_hash:
+                    results[idx] = self._result(self.RESULT_UNCHANGED, image_hash=image_hash)
+                else:
+                    image = self.decode_image(content)
+                    if image is not None:
+                        changed.append((idx, image, image_hash))
+
+            # Perceptual gate: frames that barely differ from the last checked one keep its verdict
+            pending = []
+            phashes = {}
+            for idx, image, image_hash in changed:
+                phash = phashes[idx] = self.perceptual_hash(image)
+                distance = self.hamming_distance(phash, known_phashes[idx])
+                if distance is not None and distance <= max_distance:
+                    results[idx] = self._result(self.RESULT_SIMILAR, image_hash=image_hash, phash=phash)
+                else:
+                    pending.append((idx, image, image_hash))
+
+            # Reuse verdicts other models/workers already computed for the same image
+            cached = self.get_cached_results({image_hash for _, _, image_hash in pending})
+            to_detect = []
+            for idx, image, image_hash in pending:
+                if image_hash in cached:
+                    is_naked, confidence = cached[image_hash]
+                    results[idx] = self._result(
+                        self.RESULT_CACHED, is_naked, confidence, image_hash, phashes[idx]
+                    )
+                else:
+                    to_detect.append((idx, image, image_hash))
+
+            misses = len(to_detect)
+
+            # Cascade: frames with almost no skin are confidently safe without running NudeNet
+            forwarded = []
+            for idx, image, image_hash in to_detect:
+                if self.prefilter(image):
+                    results[idx] = self._result(
+                        self.RESULT_PREFILTERED, image_hash=image_hash, phash=phashes[idx]
+                    )
+                else:
+                    forwarded.append((idx, image, image_hash))
+            to_detect = forwarded
+
+            self.record_cache_stats(
+                unchanged=len(downloaded) - len(changed),
+                similar=len(changed) - len(pending),
+                hits=len(pending) - misses,
+                misses=misses,
+                prefiltered=misses - len(to_detect),
+            )
+
+            detections = self.detect_nudity_batch([image for _, image, _ in to_detect])
+
+            new_results = {}
+            for (idx, image, image_hash), (is_naked, confidence, details) in zip(to_detect, detections):
+                # No verdict (e.g. inference server unreachable): the frame must be checked again
+                if 'error' in details:
+                    logger.warning(f"Detection failed for {image_urls[idx]}: {details['error']}")
+                    continue
+                results[idx] = self._result(
+                    self.RESULT_DETECTED, is_naked, confidence, image_hash, phashes[idx]
+                )
+                new_results[image_hash] = (is_naked, confidence)
+
+            self.cache_results(new_results)
+
+            logger.info(
+                f"Batch image check complete: {len(downloaded)}/{len(image_urls)} downloaded, "
+                f"{len(to_detect)} sent to detector"
+            )
+            return results
 
+        except Exception as e:
+            logger.error(f"Error in check_model_images: {e}", exc_info=True)
+            return results
+
+    @staticmethod
+    def _result(status, is_naked=False, confidence=0.0, image_hash=None, phash=None):
+        return {
+            'status': status,
+            'is_naked': is_naked,
+            'confidence': confidence,
+            'image_hash': image_hash,
+            'phash': phash,
+        }
+
+    @staticmethod
+    def perceptual_hash(image):
+        """
+        64-bit difference hash (dHash) of a decoded BGR image, as 16 hex characters.
+        Near-identical frames give hashes a small Hamming distance apart.
+        Returns None if the hash can't be computed.
+        """
         try:
-            current_time = time.time()
-            max_age_seconds = max_age_hours * 3600
+            gray = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+            pixels = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+        except Exception as e:
+            logger.warning(f"Could not compute perceptual hash: {e}")
+            return None
+
+        bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+        return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
 
-            for filename in os.listdir(self.cache_dir):
-                file_path = os.path.join(self.cache_dir, filename)
+    @staticmethod
+    def hamming_distance(phash, other_phash):
+        """Number of differing bits between two perceptual hashes (None if either is missing)"""
+        if not phash or not other_phash:
+            return None
+        return bin(int(phash, 16) ^ int(other_phash, 16)).count('1')
 
-                if os.path.isfile(file_path):
-                    file_age = current_time - os.path.getmtime(file_path)
+    def get_cached_results(self, image_hashes):
+        """
+        Look up verdicts for image hashes in the shared (Redis) result cache
+        Returns: {image_hash: (is_naked, confidence)}
+        """
+        if not image_hashes:
+            return {}
+
+        try:
+            cached = cache.get_many([RESULT_CACHE_KEY % image_hash for image_hash in image_hashes])
+        except Exception as e:
+            logger.warning(f"Could not read nudity result cache: {e}")
+            return {}
 
-                    if file_age > max_age_seconds:
-                        os.remove(file_path)
-                        removed_count += 1
+        return {
+            image_hash: tuple(cached[RESULT_CACHE_KEY % image_hash])
+            for image_hash in image_hashes
+            if RESULT_CACHE_KEY % image_hash in cached
+        }
 
-            if removed_count > 0:
-                logger.info(f"Cleaned up {removed_count} old cached images")
+    def cache_results(self, results):
+        """Store {image_hash: (is_naked, confidence)} verdicts in the shared result cache"""
+        if not results:
+            return
 
+        ttl = int(getattr(settings, 'NUDITY_RESULT_CACHE_TTL', 86400))
+        try:
+            cache.set_many({
+                RESULT_CACHE_KEY % image_hash: verdict
+                for image_hash, verdict in results.items()
+            }, ttl)
         except Exception as e:
-            logger.error(f"Error cleaning up cache: {e}")
+            logger.warning(f"Could not write nudity result cache: {e}")
+
+    @staticmethod
+    def record_cache_stats(**counts):
+        """Add to the shared hit/miss counters"""
+        for name, count in counts.items():
+            if not count:
+                continue
+            key = CACHE_STATS_KEY % name
+            try:
+                cache.add(key, 0, None)
+                cache.incr(key, count)
+            except Exception as e:
+                logger.warning(f"Could not update nudity cache stats: {e}")
 
-        return removed_count
+    @staticmethod
+    def get_cache_stats():
+        """
+        Shared hash-first/result-cache statistics across all workers
+        (prefiltered counts the cache misses the skin pre-filter kept from the detector)
+        Returns: {'unchanged': int, 'similar': int, 'hits': int, 'misses': int,
+                  'prefiltered': int, 'hit_rate': float}
+        """
+        names = ('unchanged', 'similar', 'hits', 'misses', 'prefiltered')
+        try:
+            values = cache.get_many([CACHE_STATS_KEY % name for name in names])
+        except Exception as e:
+            logger.warning(f"Could not read nudity cache stats: {e}")
+            values = {}
+
+        stats = {name: int(values.get(CACHE_STATS_KEY % name, 0)) for name in names}
+        lookups = stats['unchanged'] + stats['similar'] + stats['hits'] + stats['misses']
+        # Unchanged and similar images skip the detector too, so they count as hits
+        skipped = stats['unchanged'] + stats['similar'] + stats['hits']
+        stats['hit_rate'] = skipped / lookups if lookups else 0.0
+        return stats
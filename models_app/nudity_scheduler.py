@@ -0,0 +1,230 @@
+"""
+Priority scheduler for nudity checks.
+Ranks subscribed online models by the expected value of checking them now
+and sizes each cycle to the detector throughput measured by the workers.
+"""
+import heapq
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Exponentially weighted average of worker seconds spent per model check
+THROUGHPUT_CACHE_KEY = 'nudity:seconds_per_check'
+THROUGHPUT_SMOOTHING = 0.2
+
+# Chance a check finds nudity, by what we know about the model
+BASE_NUDITY_CHANCE = 0.2
+NAKED_LAST_CHECK_CHANCE = 0.6
+NEW_SHOW_CHANCE = 0.4
+
+# Minutes since coming online during which a show counts as just started
+NEW_SHOW_MINUTES = 15
+# Seconds since the last check at which staleness stops adding urgency
+MAX_STALENESS_SECONDS = 3600
+# How early a model may be picked before its next check is due, so a batch that
+# finished just after the scheduler ran doesn't push the model back a whole cycle
+NEXT_CHECK_GRACE_SECONDS = 60
+
+
+@dataclass
+class CheckCandidate:
+    """A subscribed online model and what the scheduler knows about it"""
+    model_id: int
+    subscribers: int
+    is_naked: bool
+    last_check: Optional[datetime]
+    viewers: int = 0
+    came_online_at: Optional[datetime] = None
+    score: float = 0.0
+
+
+def get_viewers(json_data) -> int:
+    """Room popularity from the platform payload (0 when the feed doesn't report it)"""
+    try:
+        return max(int((json_data or {}).get('num_users') or 0), 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
+def record_check_throughput(model_count: int, seconds: float):
+    """Fold one batch's duration into the shared seconds-per-check average"""
+    if model_count <= 0:
+        return
+
+    sample = seconds / model_count
+    try:
+        previous = cache.get(THROUGHPUT_CACHE_KEY)
+        average = sample if previous is None else (
+            THROUGHPUT_SMOOTHING * sample + (1 - THROUGHPUT_SMOOTHING) * previous
+        )
+        cache.set(THROUGHPUT_CACHE_KEY, average, None)
+    except Exception as e:
+        logger.warning(f"Could not record nudity check throughput: {e}")
+
+
+def get_seconds_per_check() -> Optional[float]:
+    """Measured worker seconds per model check, or None before the first batch"""
+    try:
+        return cache.get(THROUGHPUT_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Could not read nudity check throughput: {e}")
+        return None
+
+
+def schedule_next_check(model, now: datetime, changed: Optional[bool]):
+    """
+    Set a checked model's adaptive re-check interval and next check time (not saved).
+    Back to the minimum after a positive or a big visual change, doubled after
+    each negative with the same imagery; a failed check (changed=None) keeps the pace.
+    """
+    min_interval = int(getattr(settings, 'NUDITY_CHECK_MIN_INTERVAL', 300))
+    max_interval = int(getattr(settings, 'NUDITY_CHECK_MAX_INTERVAL', 3600))
+    previous = model.nudity_check_interval
+
+    if changed is None:
+        interval = previous or min_interval
+    elif model.is_naked or changed:
+        interval = min_interval
+    else:
+        interval = max(previous or min_interval, min_interval) * 2
+
+    model.nudity_check_interval = min(interval, max_interval)
+    model.nudity_next_check = now + timedelta(seconds=model.nudity_check_interval)
+
+
+class NudityCheckScheduler:
+    """Pick which subscribed models to check this cycle"""
+
+    def __init__(self, now: datetime = None):
+        self.now = now or timezone.now()
+        self.candidate_count = 0
+
+    def get_budget(self) -> int:
+        """
+        Checks the workers can finish before the next cycle.
+        Capped by MAX_NUDITY_CHECKS_PER_RUN, which also applies until throughput is measured.
+        """
+        max_checks = int(getattr(settings, 'MAX_NUDITY_CHECKS_PER_RUN', 100))
+        seconds_per_check = get_seconds_per_check()
+        if not seconds_per_check:
+            return max_checks
+
+        cycle_seconds = int(getattr(settings, 'NUDITY_CHECK_CYCLE_SECONDS', 300))
+        workers = int(getattr(settings, 'CELERY_WORKER_CONCURRENCY', 2))
+        share = float(getattr(settings, 'NUDITY_CHECK_WORKER_SHARE', 0.5))
+        budget = int(cycle_seconds * workers * share / seconds_per_check)
+
+        min_checks = int(getattr(settings, 'NUDITY_BATCH_SIZE', 8))
+        return max(min(budget, max_checks), min(min_checks, max_checks))
+
+    def get_candidates(self) -> List[CheckCandidate]:
+        """Online models with active subscriptions that are due a check, with their subscriber counts"""
+        from .models import ModelStatusEvent, Subscription, WebcamModel
+        from .subscription_index import get_subscriber_counts
+
+        subscribers = get_subscriber_counts()
+        if subscribers is None:
+            subscribers = dict(
+                Subscription.objects.filter(is_active=True)
+                .values('model_id')
+                .annotate(count=Count('id'))
+                .values_list('model_id', 'count')
+            )
+        if not subscribers:
+            return []
+
+        # Respect each model's adaptive backoff
+        due = self.now + timedelta(seconds=NEXT_CHECK_GRACE_SECONDS)
+        rows = WebcamModel.objects.filter(
+            Q(nudity_next_check__isnull=True) | Q(nudity_next_check__lte=due),
+            id__in=list(subscribers),
+            is_online=True
+        ).values_list('id', 'is_naked', 'nudity_last_check', 'json_data')
+
+        candidates = {
+            model_id: CheckCandidate(
+                model_id=model_id,
+                subscribers=subscribers[model_id],
+                is_naked=is_naked,
+                last_check=last_check,
+                viewers=get_viewers(json_data),
+            )
+            for model_id, is_naked, last_check, json_data in rows
+        }
+
+        # Shows that just started are the likeliest to change state
+        since = self.now - timedelta(minutes=NEW_SHOW_MINUTES)
+        came_online = ModelStatusEvent.objects.filter(
+            model_id__in=list(candidates),
+            is_online=True,
+            created_at__gte=since
+        ).values_list('model_id', 'created_at')
+        for model_id, created_at in came_online:
+            candidate = candidates[model_id]
+            if candidate.came_online_at is None or created_at > candidate.came_online_at:
+                candidate.came_online_at = created_at
+
+        return list(candidates.values())
+
+    def score(self, candidate: CheckCandidate) -> float:
+        """
+        Expected value of checking a model now:
+        audience reached x chance of nudity x urgency from time since the last check
+        """
+        audience = candidate.subscribers * (1 + math.log10(1 + candidate.viewers))
+
+        if candidate.is_naked:
+            chance = NAKED_LAST_CHECK_CHANCE
+        elif candidate.came_online_at and (
+            candidate.last_check is None or candidate.last_check < candidate.came_online_at
+        ):
+            # Not checked since the show started
+            chance = NEW_SHOW_CHANCE
+        else:
+            chance = BASE_NUDITY_CHANCE
+
+        if candidate.last_check is None:
+            staleness = 1.0
+        else:
+            elapsed = (self.now - candidate.last_check).total_seconds()
+            staleness = min(max(elapsed, 0) / MAX_STALENESS_SECONDS, 1.0)
+
+        return audience * chance * staleness
+
+    def rank(self, limit: int) -> List[CheckCandidate]:
+        """Top `limit` candidates worth checking, highest expected value first"""
+        candidates = self.get_candidates()
+        for candidate in candidates:
+            candidate.score = self.score(candidate)
+
+        self.candidate_count = len(candidates)
+        return heapq.nlargest(limit, (c for c in candidates if c.score > 0), key=lambda c: c.score)
+
+    def select(self, budget: int = None) -> List[int]:
+        """Model ids to check this cycle, highest expected value first"""
+        budget = self.get_budget() if budget is None else budget
+        selected = self.rank(budget)
+
+        logger.info(
+            f"Nudity scheduler: {len(selected)} of {self.candidate_count} subscribed online models "
+            f"selected (budget {budget})"
+        )
+        return [candidate.model_id for candidate in selected]
+
+    def describe(self, limit: int = 20) -> List[Dict]:
+        """Current ranking, for debugging from the shell"""
+        ranked = self.rank(limit)
+        return [
+            {'model_id': c.model_id, 'score': round(c.score, 3), 'subscribers': c.subscribers,
+             'viewers': c.viewers, 'is_naked': c.is_naked, 'last_check': c.last_check}
+            for c in ranked
+        ]
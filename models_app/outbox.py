@@ -0,0 +1,337 @@
+"""
+Notification outbox.
+Notification rows are the outbox: a long-running dispatcher claims pending
+rows in batches (SELECT ... FOR UPDATE SKIP LOCKED plus a lease), delivers
+them through the channel registered for their type, and retries failures
+with exponential backoff.
+"""
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from .fanout import get_fanout_latency, record_delivered
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Rolling delivery metrics written by the dispatcher
+METRICS_CACHE_KEY = 'notifications:outbox:metrics'
+LATENCY_SMOOTHING = 0.2
+
+
+def render_notification_email(notification):
+    """Subject, plain-text body and recipient for a nudity alert"""
+    sub = notification.subscription
+    model = notification.model
+
+    # Get viewer count from JSON data
+    viewers = 'N/A'
+    if model.json_data and isinstance(model.json_data, dict):
+        viewers = model.json_data.get('num_users', 'N/A')
+
+    # Email subject
+    subject = f'🔥 {model.display_name} is live and naked!'
+
+    # Plain text message
+    plain_message = f"""
+Hi {sub.user.username},
+
+Your favorite model {model.display_name} is currently live and showing nudity!
+
+🔥 Watch now: {model.chat_url or 'https://chaturbate.com'}
+👥 Viewers: {viewers}
+📊 Nudity Confidence: {(model.nudity_confidence or 0) * 100:.0f}%
+⏰ Detected: {timezone.now().strftime('%Y-%m-%d %H:%M')}
+
+Don't miss out!
+
+---
+To unsubscribe from {model.display_name}, visit: {settings.SITE_URL}/subscriptions/
+
+XShows - Live Webcam Notifications
+    """.strip()
+
+    return subject, plain_message, sub.user.email
+
+
+class NotificationChannel:
+    """Delivers notifications of one type"""
+
+    def send(self, notifications: List[Notification]) -> Dict[int, Optional[str]]:
+        """
+        Deliver notifications (loaded with subscription__user and model)
+        Returns: {notification id: None if sent, else the error message}
+        """
+        raise NotImplementedError
+
+
+class EmailChannel(NotificationChannel):
+    """Send a batch of emails over one SMTP connection"""
+
+    def send(self, notifications: List[Notification]) -> Dict[int, Optional[str]]:
+        from django.core.mail import EmailMessage, get_connection
+
+        results = {}
+        connection = get_connection()
+
+        try:
+            connection.open()
+            for notification in notifications:
+                try:
+                    subject, plain_message, recipient = render_notification_email(notification)
+                    if not recipient:
+                        raise ValueError('Subscriber has no email address')
+
+                    message = EmailMessage(
+                        subject=subject,
+                        body=plain_message,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[recipient],
+                        connection=connection,
+                    )
+                    connection.send_messages([message])
+                    results[notification.id] = None
+
+                except Exception as e:
+                    results[notification.id] = str(e)
+                    logger.error(f"❌ Error sending email for notification {notification.id}: {e}")
+
+                    # The server may have dropped the session; start a fresh one for the rest
+                    try:
+                        connection.close()
+                        connection.open()
+                    except Exception as reconnect_error:
+                        logger.warning(f"Could not reopen SMTP connection: {reconnect_error}")
+
+        except Exception as e:
+            # Couldn't connect at all: everything not yet sent fails
+            logger.error(f"❌ SMTP connection failed: {e}", exc_info=True)
+            for notification in notifications:
+                results.setdefault(notification.id, str(e))
+
+        finally:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        return results
+
+
+# Notification type -> channel (register SMS here once it exists)
+CHANNELS: Dict[str, NotificationChannel] = {
+    Notification.TYPE_EMAIL: EmailChannel(),
+}
+
+
+def register_channel(notification_type: str, channel: NotificationChannel):
+    """Plug in a delivery channel for a notification type"""
+    CHANNELS[notification_type] = channel
+
+
+def is_enabled() -> bool:
+    """Whether notify_subscribers leaves delivery to the outbox dispatcher"""
+    return getattr(settings, 'NOTIFICATION_OUTBOX_ENABLED', False)
+
+
+def retry_delay(attempts: int) -> int:
+    """Exponential backoff in seconds after the given number of failed attempts"""
+    base = int(getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 60))
+    return base * 2 ** max(attempts - 1, 0)
+
+
+class OutboxDispatcher:
+    """Claim, deliver and retry pending notifications"""
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = batch_size or int(getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 200))
+        self.lease_seconds = int(getattr(settings, 'NOTIFICATION_OUTBOX_LEASE_SECONDS', 300))
+        self.max_attempts = int(getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5))
+
+    def due(self, now):
+        """Pending notifications with a channel whose next attempt is due"""
+        return Notification.objects.filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            status=Notification.STATUS_PENDING,
+            notification_type__in=list(CHANNELS),
+        )
+
+    def claim(self, notification_ids: List[int] = None) -> List[Notification]:
+        """
+        Lock a batch of due rows (skipping rows other dispatchers or delivery tasks
+        hold) and lease them by pushing next_attempt_at forward, so a crashed
+        dispatcher's rows become due again once the lease runs out.
+        notification_ids: only claim among these rows (a send_email_notifications chunk)
+        """
+        now = timezone.now()
+        due = self.due(now)
+        if notification_ids is not None:
+            due = due.filter(id__in=notification_ids)
+
+        with transaction.atomic():
+            ids = list(
+                due
+                .select_for_update(skip_locked=True)
+                .order_by('id')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            if ids:
+                Notification.objects.filter(id__in=ids).update(
+                    attempts=F('attempts') + 1,
+                    next_attempt_at=now + timezone.timedelta(seconds=self.lease_seconds)
+                )
+
+        return list(
+            Notification.objects.filter(id__in=ids).select_related('subscription__user', 'model')
+        )
+
+    def deliver(self, notifications: List[Notification]) -> Dict[int, Optional[str]]:
+        """Send claimed notifications through their channels"""
+        by_type = {}
+        for notification in notifications:
+            by_type.setdefault(notification.notification_type, []).append(notification)
+
+        results = {}
+        for notification_type, batch in by_type.items():
+            results.update(CHANNELS[notification_type].send(batch))
+        return results
+
+    def record(self, notifications: List[Notification], results: Dict[int, Optional[str]]):
+        """Mark sent rows, schedule retries, and give up after NOTIFICATION_MAX_ATTEMPTS"""
+        now = timezone.now()
+        sent_ids = [notification.id for notification in notifications if results.get(notification.id) is None]
+        sent = set(sent_ids)
+        retried = []
+
+        for notification in notifications:
+            error = results.get(notification.id)
+            if error is None:
+                continue
+            notification.error_message = error
+            if notification.attempts >= self.max_attempts:
+                notification.status = Notification.STATUS_FAILED
+                notification.next_attempt_at = None
+            else:
+                notification.next_attempt_at = now + timezone.timedelta(seconds=retry_delay(notification.attempts))
+            retried.append(notification)
+
+        Notification.objects.filter(id__in=sent_ids).update(
+            status=Notification.STATUS_SENT,
+            sent_at=now,
+            next_attempt_at=None
+        )
+        Notification.objects.bulk_update(retried, ['status', 'error_message', 'next_attempt_at'])
+
+        # Fan-out progress counts emails that are done, sent or given up on
+        record_delivered(Counter(
+            notification.fanout_id for notification in notifications
+            if notification.id in sent or notification.status == Notification.STATUS_FAILED
+        ))
+
+        latencies = [
+            (now - notification.created_at).total_seconds()
+            for notification in notifications if notification.id in sent
+        ]
+        return len(sent_ids), retried, latencies
+
+    def dispatch_once(self) -> Dict:
+        """
+        Claim and deliver one batch
+        Returns: {'claimed': int, 'sent': int, 'retrying': int, 'failed': int, 'seconds': float}
+        """
+        started = time.perf_counter()
+        notifications = self.claim()
+        if not notifications:
+            return {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0, 'seconds': 0.0}
+
+        results = self.deliver(notifications)
+        sent, retried, latencies = self.record(notifications, results)
+        failed = sum(notification.status == Notification.STATUS_FAILED for notification in retried)
+
+        report = {
+            'claimed': len(notifications),
+            'sent': sent,
+            'retrying': len(retried) - failed,
+            'failed': failed,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        self.update_metrics(report, latencies)
+
+        logger.info(
+            f"Outbox: {report['sent']} sent, {report['retrying']} retrying, {report['failed']} failed "
+            f"of {report['claimed']} in {report['seconds']}s"
+        )
+        return report
+
+    def run_forever(self, poll_seconds: float = None):
+        """Dispatch batches back to back while there is work, polling when idle"""
+        poll_seconds = poll_seconds if poll_seconds is not None else float(
+            getattr(settings, 'NOTIFICATION_OUTBOX_POLL_SECONDS', 2)
+        )
+        logger.info(f"Notification dispatcher started (batch size {self.batch_size})")
+        while True:
+            try:
+                report = self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Outbox dispatch failed: {e}", exc_info=True)
+                report = {'claimed': 0}
+
+            if report['claimed'] < self.batch_size:
+                time.sleep(poll_seconds)
+
+    def update_metrics(self, report: Dict, latencies: List[float]):
+        """Fold a batch into the shared delivery counters and latency average"""
+        try:
+            metrics = cache.get(METRICS_CACHE_KEY) or {
+                'sent': 0, 'failed': 0, 'retries': 0, 'avg_latency_seconds': None, 'max_latency_seconds': 0.0,
+            }
+            metrics['sent'] += report['sent']
+            metrics['failed'] += report['failed']
+            metrics['retries'] += report['retrying']
+            if latencies:
+                batch_average = sum(latencies) / len(latencies)
+                previous = metrics['avg_latency_seconds']
+                metrics['avg_latency_seconds'] = round(batch_average if previous is None else (
+                    LATENCY_SMOOTHING * batch_average + (1 - LATENCY_SMOOTHING) * previous
+                ), 3)
+                metrics['max_latency_seconds'] = round(max(metrics['max_latency_seconds'], max(latencies)), 3)
+            metrics['updated_at'] = timezone.now().isoformat()
+            cache.set(METRICS_CACHE_KEY, metrics, None)
+        except Exception as e:
+            logger.warning(f"Could not update outbox metrics: {e}")
+
+
+def get_outbox_metrics() -> Dict:
+    """
+    Queue depth (pending rows with a delivery channel) and delivery latency
+    Returns: {'queue_depth': int, 'due': int, 'oldest_pending_seconds': float|None,
+              'sent': int, 'failed': int, 'retries': int,
+              'avg_latency_seconds': float|None, 'max_latency_seconds': float,
+              'fanout_latency': detection-to-last-email latency, see fanout.get_fanout_latency}
+    """
+    now = timezone.now()
+    pending = Notification.objects.filter(
+        status=Notification.STATUS_PENDING,
+        notification_type__in=list(CHANNELS)
+    )
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+
+    metrics = {
+        'queue_depth': pending.count(),
+        'due': OutboxDispatcher().due(now).count(),
+        'oldest_pending_seconds': round((now - oldest).total_seconds(), 1) if oldest else None,
+        'sent': 0, 'failed': 0, 'retries': 0, 'avg_latency_seconds': None, 'max_latency_seconds': 0.0,
+    }
+    try:
+        metrics.update(cache.get(METRICS_CACHE_KEY) or {})
+    except Exception as e:
+        logger.warning(f"Could not read outbox metrics: {e}")
+    metrics['fanout_latency'] = get_fanout_latency()
+    return metrics
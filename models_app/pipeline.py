@@ -0,0 +1,93 @@
+"""
+Single-pass scrape pipeline.
+Fetches a platform feed once and runs parse, upsert, category sync and
+online-status update as stages over the same batches.
+"""
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from core.models import Config
+from .services import ScrapingService
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapePipeline:
+    """Run every scrape stage for one platform over a single fetch"""
+
+    STAGES = ('fetch', 'parse', 'upsert', 'categories', 'status')
+
+    def __init__(self, service: ScrapingService, config: Config,
+                 update_status: bool = True, sync_categories: bool = True):
+        self.service = service
+        self.config = config
+        self.update_status = update_status
+        self.sync_categories = sync_categories
+        self.timings = defaultdict(float)
+        self.transitions = {'online': [], 'offline': []}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Accumulate wall-clock time spent in a stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+
+    def timed_batches(self, params: Dict = None) -> Iterator[List[Dict]]:
+        """Yield API batches, counting time spent waiting on the feed as the fetch stage"""
+        batches = self.service.iter_batches(self.config, params)
+        while True:
+            with self.stage('fetch'):
+                batch = next(batches, None)
+            if batch is None:
+                return
+            yield batch
+
+    def run(self, params: Dict = None) -> Dict:
+        """
+        Fetch, save and sync one platform.
+        Online/offline transitions are kept on self.transitions.
+        Returns: {'models': int, 'inserted': int, 'updated': int, 'unchanged': int,
+                  'went_online': int, 'went_offline': int, 'timings': {stage: seconds}}
+        """
+        report = {'models': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0}
+        model_ids = []
+
+        for batch in self.timed_batches(params):
+            with self.stage('parse'):
+                parsed_models = self.service.parse_models(batch, self.config)
+
+            with self.stage('upsert'):
+                stats = self.service.upsert_models(parsed_models, self.config)
+
+            for key, value in stats.items():
+                report[key] += value
+
+            if self.sync_categories:
+                with self.stage('categories'):
+                    self.service.update_categories(batch, self.config)
+
+            model_ids.extend(model_id for model_id in map(self.service.item_id, batch) if model_id)
+
+        # Only flip online/offline status when the feed returned models
+        if self.update_status and model_ids:
+            with self.stage('status'):
+                self.transitions = self.service.update_online_status(model_ids, self.service.source)
+
+        report['models'] = len(model_ids)
+        report['went_online'] = len(self.transitions['online'])
+        report['went_offline'] = len(self.transitions['offline'])
+        report['timings'] = {name: round(self.timings[name], 3) for name in self.STAGES if name in self.timings}
+
+        timings = ', '.join(f"{name}={seconds:.2f}s" for name, seconds in report['timings'].items())
+        logger.info(
+            f"Pipeline {self.service.source}: {report['models']} models "
+            f"({report['inserted']} inserted, {report['updated']} updated, "
+            f"{report['unchanged']} unchanged) - {timings}"
+        )
+        return report
@@ -2,187 +2,569 @@
 Scraping services for fetching model data from various platforms.
 Converted from Laravel RequestApiService.
 """
+import hashlib
+import json
+import ijson
 import requests
 import logging
-from typing import Dict, List, Optional
-from django.db import transaction
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
 from django.db.models import Q
+from django.utils import timezone
 
-from .models import WebcamModel, ModelCategory
+from .fetcher import AsyncFetcher, RequestSpec, get_client_ip
+from .models import WebcamModel, ModelCategory, ModelStatusEvent
 from categories.models import Category
 from core.models import Config
 
 logger = logging.getLogger(__name__)
 
+# Redis key holding the set of model IDs seen online in the last scrape of a source
+ONLINE_IDS_CACHE_KEY = 'scraper:online_ids:%s'
+
+
+def get_batch_size() -> int:
+    """Rows per bulk query when saving scraped data"""
+    return int(getattr(settings, 'SCRAPE_BATCH_SIZE', 500))
+
+
+def get_online_ids_ttl() -> int:
+    """Seconds before the cached online set is re-seeded from the database"""
+    return int(getattr(settings, 'SCRAPE_ONLINE_SET_TTL', 1800))
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    """Yield successive lists of at most `size` items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class ScrapingService:
     """Base scraping service for all platforms"""
 
+    # Platform identifier stored in WebcamModel.source (set by subclasses)
+    source = None
+
+    # ijson prefix of the model list in the API response (set by subclasses)
+    items_path = 'item'
+
+    # Key holding the tag list on each API item
+    tags_key = 'tags'
+
+    # Columns that are only written when a model is first created
+    PROTECTED_FIELDS = ('unique_user_name', 'source')
+
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+        self.fetcher = AsyncFetcher()
 
-    def get_data(self, config: Config, params: Dict = None) -> Optional[Dict]:
-        """Fetch data from API"""
-        try:
-            # Merge config data with params
-            config_data = {}
-            if config.data:
-                import json
-                try:
-                    config_data = json.loads(config.data)
-                except:
-                    pass
-
-            if params:
-                config_data.update(params)
-
-            # Add client_ip for Chaturbate
-            if 'chaturbate' in config.api_url.lower() and 'client_ip' not in config_data:
-                try:
-                    ip_response = self.session.get('https://api.ipify.org', timeout=5)
-                    config_data['client_ip'] = ip_response.text
-                except:
-                    config_data['client_ip'] = '8.8.8.8'
-
-            # Make request based on method
-            if config.method == 'GET':
-                response = self.session.get(config.api_url, params=config_data, timeout=30)
-            else:
-                response = self.session.post(config.api_url, data=config_data, timeout=30)
+    def build_request(self, config: Config, params: Dict = None) -> RequestSpec:
+        """Build the (method, url, kwargs) request spec for a config"""
+        # Merge config data with params
+        config_data = {}
+        if config.data:
+            try:
+                config_data = json.loads(config.data)
+            except:
+                pass
+
+        if params:
+            config_data.update(params)
+
+        # Add client_ip for Chaturbate
+        if 'chaturbate' in config.api_url.lower() and 'client_ip' not in config_data:
+            config_data['client_ip'] = get_client_ip()
+
+        # Make request based on method
+        if config.method == 'GET':
+            return 'GET', config.api_url, {'params': config_data, 'timeout': 30}
+        return 'POST', config.api_url, {'data': config_data, 'timeout': 30}
+
+    def handle_response(self, response: Optional[requests.Response]) -> Optional[Dict]:
+        """Decode an API response, returning None on failure"""
+        if response is None:
+            return None
 
+        try:
             if response.status_code == 200:
                 return response.json()
             else:
                 logger.error(f"API request failed: {response.status_code}")
                 return None
 
+        except Exception as e:
+            logger.error(f"Error decoding response from {response.url}: {str(e)}")
+            return None
+
+    def get_data(self, config: Config, params: Dict = None) -> Optional[Dict]:
+        """Fetch data from API"""
+        try:
+            method, url, kwargs = self.build_request(config, params)
+            return self.handle_response(self.fetcher.request(method, url, **kwargs))
+
         except Exception as e:
             logger.error(f"Error fetching data: {str(e)}")
             return None
 
-    def save_data(self, data: List[Dict], config: Config):
-        """Save model data to database"""
-        if not data:
+    def get_data_many(self, config: Config, params_list: List[Dict]) -> List[Optional[Dict]]:
+        """Fetch several parameter sets from the same API concurrently, preserving order"""
+        try:
+            specs = [self.build_request(config, params) for params in params_list]
+            return [self.handle_response(response) for response in self.fetcher.fetch_all(specs)]
+
+        except Exception as e:
+            logger.error(f"Error fetching data: {str(e)}")
+            return [None] * len(params_list)
+
+    def iter_items(self, config: Config, params: Dict = None) -> Iterator[Dict]:
+        """
+        Yield model items from the API one at a time.
+        In streaming mode the response body is parsed incrementally, so the
+        full payload is never held in memory.
+        """
+        if not getattr(settings, 'SCRAPE_STREAM_RESPONSES', True):
+            yield from self.extract_items(self.get_data(config, params))
+            return
+
+        method, url, kwargs = self.build_request(config, params)
+        response = self.fetcher.request(method, url, stream=True, **kwargs)
+        if response is None:
             return
 
+        try:
+            if response.status_code != 200:
+                logger.error(f"API request failed: {response.status_code}")
+                return
+
+            response.raw.decode_content = True
+            yield from ijson.items(response.raw, self.items_path, use_float=True)
+        finally:
+            response.close()
+
+    def iter_batches(self, config: Config, params: Dict = None, batch_size: int = None) -> Iterator[List[Dict]]:
+        """Yield model items from the API in bounded batches"""
+        return chunked(self.iter_items(config, params), batch_size or get_batch_size())
+
+    def extract_items(self, data) -> List[Dict]:
+        """Get the model list out of a decoded API response (lists are returned as is)"""
+        if isinstance(data, list):
+            return data
+
+        for key in self.items_path.split('.')[:-1]:
+            data = data.get(key) if isinstance(data, dict) else None
+
+        return data if isinstance(data, list) else []
+
+    def item_id(self, item: Dict) -> Optional[str]:
+        """model_id of a raw API item - to be overridden"""
+        return None
+
+    def save_data(self, data: List[Dict], config: Config) -> Dict[str, int]:
+        """
+        Bulk upsert model data into the database.
+        Returns: {'inserted': int, 'updated': int, 'unchanged': int}
+        """
+        return self.upsert_models(self.parse_models(data, config), config)
+
+    def parse_models(self, data: List[Dict], config: Config) -> Dict:
+        """Parse API data into fingerprinted model payloads keyed by model_id"""
+        if not data:
+            return {}
+
         # Handle nested response format (e.g., Chaturbate returns {"results": [...], "count": N})
-        if isinstance(data, dict) and 'results' in data:
-            data = data['results']
+        data = self.extract_items(data)
 
         # Parse data based on source
         parsed_models = self.parse_data(data, config)
+
+        for model_data in parsed_models.values():
+            model_data['content_hash'] = self.fingerprint(model_data)
+
+        return parsed_models
+
+    def upsert_models(self, parsed_models: Dict, config: Config) -> Dict[str, int]:
+        """
+        Write parsed models to the database.
+        Existing rows only get the columns that actually changed written back.
+        Returns: {'inserted': int, 'updated': int, 'unchanged': int}
+        """
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
         if not parsed_models:
-            return
+            return stats
 
-        model_ids = list(parsed_models.keys())
+        batch_size = get_batch_size()
+        now = timezone.now()
 
         with transaction.atomic():
-            # Get existing models
-            existing_models = WebcamModel.objects.filter(
-                source=config.SOURCE_CHATURBATE if hasattr(config, 'SOURCE_CHATURBATE') else config.method,
-                model_id__in=model_ids
-            )
-
+            # Update existing models, grouped by the set of columns that changed
+            changed_groups = defaultdict(list)
             existing_ids = set()
-            # Update existing models
-            for model in existing_models:
-                model_data = parsed_models[model.model_id].copy()
-                # Don't update unique_user_name and source for existing models
-                model_data.pop('unique_user_name', None)
-                model_data.pop('source', None)
-
-                for key, value in model_data.items():
-                    setattr(model, key, value)
-                model.save()
-                existing_ids.add(model.model_id)
+            # Rows whose is_online flips with this write, by new state
+            transitions = {True: [], False: []}
+
+            for model_ids in chunked(parsed_models.keys(), batch_size):
+                # Compare fingerprints first so unchanged rows are never loaded
+                stale_ids = set()
+                existing_hashes = WebcamModel.objects.filter(
+                    source=self.source,
+                    model_id__in=model_ids
+                ).values_list('model_id', 'content_hash')
+
+                for model_id, content_hash in existing_hashes:
+                    existing_ids.add(model_id)
+                    if content_hash != parsed_models[model_id]['content_hash']:
+                        stale_ids.add(model_id)
+                    else:
+                        stats['unchanged'] += 1
+
+                if not stale_ids:
+                    continue
+
+                existing_models = WebcamModel.objects.filter(
+                    source=self.source,
+                    model_id__in=stale_ids
+                )
+
+                for model in existing_models:
+                    changed_fields = self.apply_changes(model, parsed_models[model.model_id])
+                    if 'is_online' in changed_fields and model.is_online:
+                        changed_fields |= self.reset_nudity_backoff(model)
+
+                    if changed_fields:
+                        model.updated_at = now
+                        changed_fields.add('updated_at')
+                        changed_groups[frozenset(changed_fields)].append(model)
+                        if 'is_online' in changed_fields:
+                            transitions[model.is_online].append(model.pk)
+                    else:
+                        stats['unchanged'] += 1
+
+            for fields, models in changed_groups.items():
+                WebcamModel.objects.bulk_update(models, list(fields), batch_size=batch_size)
+                stats['updated'] += len(models)
 
             # Create new models
-            new_models = []
-            for model_id, model_data in parsed_models.items():
-                if model_id not in existing_ids:
-                    new_models.append(WebcamModel(**model_data))
+            new_models = [
+                WebcamModel(**model_data)
+                for model_id, model_data in parsed_models.items()
+                if model_id not in existing_ids
+            ]
 
             if new_models:
-                WebcamModel.objects.bulk_create(new_models, ignore_conflicts=True)
+                # Handle duplicate usernames before they hit the unique index
+                self.handle_duplicate_usernames(new_models)
+                inserted = self.insert_models(new_models, batch_size)
+                stats['inserted'] = len(inserted)
+
+                # A model first seen online has just come online
+                online_ids = [model.model_id for model in inserted if model.is_online]
+                if any(model.pk is None for model in inserted):
+                    # MySQL doesn't return primary keys from bulk inserts
+                    for model_ids in chunked(online_ids, batch_size):
+                        transitions[True].extend(
+                            WebcamModel.objects.filter(
+                                source=self.source,
+                                model_id__in=model_ids,
+                                created_at__gte=now
+                            ).values_list('id', flat=True)
+                        )
+                else:
+                    transitions[True].extend(model.pk for model in inserted if model.is_online)
+
+            self.record_status_events(self.source, transitions[True], is_online=True)
+            self.record_status_events(self.source, transitions[False], is_online=False)
+
+        logger.info(
+            f"Saved {len(parsed_models)} models from {config.api_url}: "
+            f"{stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged"
+        )
+        return stats
+
+    def fingerprint(self, model_data: Dict) -> str:
+        """Stable hash of a parsed model payload, used to skip rows that haven't changed"""
+        payload = {
+            key: value for key, value in model_data.items()
+            if key not in self.PROTECTED_FIELDS and key != 'content_hash'
+        }
+        serialized = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.md5(serialized.encode('utf-8')).hexdigest()
+
+    def apply_changes(self, model: WebcamModel, model_data: Dict) -> set:
+        """Copy parsed values onto an existing model, returning the names of fields that changed"""
+        changed_fields = set()
+
+        for key, value in model_data.items():
+            # Don't update unique_user_name and source for existing models
+            if key in self.PROTECTED_FIELDS:
+                continue
 
-            # Handle duplicate usernames
-            self.handle_duplicate_usernames()
+            field = WebcamModel._meta.get_field(key)
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                pass
 
-            logger.info(f"Saved {len(parsed_models)} models from {config.api_url}")
+            if getattr(model, field.attname) != value:
+                setattr(model, field.attname, value)
+                changed_fields.add(key)
+
+        return changed_fields
+
+    @staticmethod
+    def reset_nudity_backoff(model: WebcamModel) -> set:
+        """A show that just started is due a nudity check regardless of its backoff (not saved)"""
+        model.nudity_check_interval = None
+        model.nudity_next_check = None
+        return {'nudity_check_interval', 'nudity_next_check'}
 
     def parse_data(self, data: List[Dict], config: Config) -> Dict:
         """Parse API data - to be overridden by platform-specific services"""
         raise NotImplementedError("Subclasses must implement parse_data")
 
-    def update_online_status(self, model_ids: List[str], source: str):
-        """Update online/offline status for models"""
-        # Set online for models in the list
-        WebcamModel.objects.filter(
-            source=source,
-            model_id__in=model_ids
-        ).update(is_online=True)
-
-        # Set offline for models not in the list
-        WebcamModel.objects.filter(
-            source=source
-        ).exclude(
-            model_id__in=model_ids
-        ).update(is_online=False)
+    def update_online_status(self, model_ids: List[str], source: str) -> Dict[str, List[str]]:
+        """
+        Update online/offline status for models.
+        Every model in the feed is set online and models that dropped out of the
+        previously known online set are set offline; only rows whose stored state
+        differs are flipped (and get events).
+        Returns: {'online': [model_id, ...], 'offline': [model_id, ...]} transitions
+        """
+        current_ids = {str(model_id) for model_id in model_ids}
+        previous_ids = self.get_known_online_ids(source)
+
+        with transaction.atomic():
+            # Set online for every model in the feed: only rows stored as offline change, so rows
+            # the cached set wrongly lists as online (failed flip, manual edit) heal on the next scrape
+            went_online = self.flip_online_status(source, current_ids, is_online=True)
+
+            # Set offline for models that dropped out of the feed
+            went_offline = self.flip_online_status(source, previous_ids - current_ids, is_online=False)
+
+        try:
+            cache.set(ONLINE_IDS_CACHE_KEY % source, current_ids, get_online_ids_ttl())
+        except Exception as e:
+            logger.warning(f"Could not cache online set for {source}: {e}")
+
+        logger.info(f"Online status {source}: {len(went_online)} came online, {len(went_offline)} went offline")
+        return {'online': went_online, 'offline': went_offline}
+
+    def flip_online_status(self, source: str, model_ids: Iterable[str], is_online: bool) -> List[str]:
+        """
+        Set is_online on the given models whose stored state differs and record
+        their transition events. The known online set can be stale (e.g. after an
+        admin edit), so rows already in the target state are left alone.
+        Returns: model_ids that actually changed state
+        """
+        batch_size = get_batch_size()
+        flipped = []
+
+        for ids in chunked(sorted(model_ids), batch_size):
+            rows = list(
+                WebcamModel.objects.select_for_update().filter(
+                    source=source,
+                    model_id__in=ids,
+                    is_online=not is_online
+                ).values_list('id', 'model_id')
+            )
+            # A show that just started is due a nudity check regardless of its backoff
+            backoff = {'nudity_check_interval': None, 'nudity_next_check': None} if is_online else {}
+            WebcamModel.objects.filter(id__in=[pk for pk, _ in rows]).update(is_online=is_online, **backoff)
+            flipped.extend(rows)
+
+        # Publish transition events in the same transaction as the status change
+        self.record_status_events(source, [pk for pk, _ in flipped], is_online=is_online)
+        return sorted(model_id for _, model_id in flipped)
+
+    def record_status_events(self, source: str, model_pks: List[int], is_online: bool):
+        """Append ModelStatusEvent rows for models (by primary key) that changed state"""
+        if model_pks:
+            ModelStatusEvent.objects.bulk_create([
+                ModelStatusEvent(model_id=pk, source=source, is_online=is_online)
+                for pk in model_pks
+            ], batch_size=get_batch_size())
+
+    def get_known_online_ids(self, source: str) -> set:
+        """Model IDs online after the previous scrape (Redis, falling back to the database)"""
+        try:
+            online_ids = cache.get(ONLINE_IDS_CACHE_KEY % source)
+        except Exception as e:
+            logger.warning(f"Could not read cached online set for {source}: {e}")
+            online_ids = None
+
+        if online_ids is None:
+            online_ids = set(WebcamModel.objects.filter(
+                source=source,
+                is_online=True
+            ).values_list('model_id', flat=True))
+
+        return online_ids
 
     def update_categories(self, data: List[Dict], config: Config):
-        """Update categories/tags for models"""
+        """
+        Update categories/tags for models in bulk.
+        Builds one tag -> category index for the batch, diffs the wanted
+        ModelCategory rows against the existing ones in memory and applies
+        the difference with bulk inserts and batched deletes.
+        """
         tags_map = self.extract_tags(data, config)
         if not tags_map:
             return
 
-        model_ids = list(tags_map.keys())
-        models = WebcamModel.objects.filter(
-            source=config.method,
-            model_id__in=model_ids
-        ).prefetch_related('categories')
-
-        for model in models:
-            tags = tags_map.get(model.model_id, [])
-            if tags:
-                # Find matching categories
-                categories = Category.objects.filter(
-                    Q(name__in=tags) | Q(display_name__in=tags)
-                )
-                model.categories.set(categories)
+        batch_size = get_batch_size()
+
+        # Find matching categories for every tag in the batch at once
+        # (keys are lowercased to match MySQL's case-insensitive comparison)
+        all_tags = {tag for tags in tags_map.values() for tag in tags if isinstance(tag, str)}
+        category_index = defaultdict(set)
+        for tags in chunked(all_tags, batch_size):
+            categories = Category.objects.filter(
+                Q(name__in=tags) | Q(display_name__in=tags)
+            ).values_list('id', 'name', 'display_name')
+
+            for category_id, name, display_name in categories:
+                category_index[name.lower()].add(category_id)
+                category_index[display_name.lower()].add(category_id)
+
+        for model_ids in chunked(tags_map.keys(), batch_size):
+            models = WebcamModel.objects.filter(
+                source=self.source,
+                model_id__in=model_ids
+            ).values_list('id', 'model_id')
+
+            wanted = set()
+            for pk, model_id in models:
+                for tag in tags_map[model_id]:
+                    if isinstance(tag, str):
+                        wanted.update((pk, category_id) for category_id in category_index.get(tag.lower(), ()))
+
+            model_pks = {pk for pk, model_id in models}
+            existing = {
+                (model_pk, category_id): link_id
+                for link_id, model_pk, category_id in ModelCategory.objects.filter(
+                    model_id__in=model_pks
+                ).values_list('id', 'model_id', 'category_id')
+            }
+
+            stale_link_ids = [link_id for pair, link_id in existing.items() if pair not in wanted]
+            if stale_link_ids:
+                ModelCategory.objects.filter(id__in=stale_link_ids).delete()
+
+            new_links = [
+                ModelCategory(model_id=model_pk, category_id=category_id)
+                for model_pk, category_id in wanted
+                if (model_pk, category_id) not in existing
+            ]
+            if new_links:
+                ModelCategory.objects.bulk_create(new_links, batch_size=batch_size, ignore_conflicts=True)
 
     def extract_tags(self, data: List[Dict], config: Config) -> Dict[str, List[str]]:
-        """Extract tags from data - to be overridden"""
-        return {}
+        """Extract tags from data, keyed by model_id"""
+        tags_map = {}
+        for item in self.extract_items(data):
+            model_id = self.item_id(item)
+            tags = item.get(self.tags_key, [])
+            if model_id and tags:
+                tags_map[model_id] = tags
+        return tags_map
 
-    def handle_duplicate_usernames(self):
-        """Handle duplicate unique_user_name by appending numbers"""
-        # Find duplicates
-        from django.db.models import Count
-        duplicates = WebcamModel.objects.values('unique_user_name').annotate(
-            count=Count('id')
-        ).filter(count__gt=1)
+    def insert_models(self, new_models: List[WebcamModel], batch_size: int) -> List[WebcamModel]:
+        """
+        Insert new models, returning the ones that were stored.
+        If the bulk insert fails (a name taken by an overlapping run, or data
+        the column rejects) the batch is retried row by row and every row
+        that still fails is logged, instead of being dropped silently.
+        """
+        try:
+            with transaction.atomic():
+                WebcamModel.objects.bulk_create(new_models, batch_size=batch_size)
+            return new_models
+        except DatabaseError as e:
+            logger.warning(f"Bulk insert of {len(new_models)} {self.source} models failed, inserting one by one: {e}")
+
+        inserted = []
+        for model in new_models:
+            # Backends that return keys may have set one before the rollback
+            model.pk = None
+            try:
+                with transaction.atomic():
+                    model.save(force_insert=True)
+                inserted.append(model)
+            except DatabaseError as e:
+                logger.error(f"Could not insert {self.source} model {model.model_id}: {e}")
+        return inserted
+
+    def handle_duplicate_usernames(self, new_models: List[WebcamModel]):
+        """
+        Handle duplicate unique_user_name on new models by appending numbers.
+        Only names from the incoming batch are looked up, so the cost grows
+        with the batch rather than with the whole table.
+        """
+        batch_size = get_batch_size()
+        pending = [model for model in new_models if model.unique_user_name]
+        if not pending:
+            return
 
-        for dup in duplicates:
-            username = dup['unique_user_name']
-            models = WebcamModel.objects.filter(unique_user_name=username).order_by('id')
+        # MySQL's default collation compares names case-insensitively
+        taken = set()
+        for names in chunked({model.unique_user_name for model in pending}, batch_size):
+            taken.update(
+                name.lower() for name in
+                WebcamModel.objects.filter(unique_user_name__in=names).values_list('unique_user_name', flat=True)
+            )
+
+        # Claim free names in batch order, collecting the ones that need a suffix
+        duplicates = []
+        for model in pending:
+            name = model.unique_user_name.lower()
+            if name in taken:
+                duplicates.append(model)
+            else:
+                taken.add(name)
+
+        if not duplicates:
+            return
+
+        # Fetch suffixed names already in use for the colliding usernames only
+        for bases in chunked({model.unique_user_name for model in duplicates}, batch_size):
+            query = Q()
+            for base in bases:
+                query |= Q(unique_user_name__startswith=f"{base}_")
+            taken.update(
+                name.lower() for name in
+                WebcamModel.objects.filter(query).values_list('unique_user_name', flat=True)
+            )
 
-            for idx, model in enumerate(models):
-                if idx > 0:  # Keep first one as is
-                    model.unique_user_name = f"{username}_{idx}"
-                    model.save()
+        for model in duplicates:
+            username = model.unique_user_name
+            idx = 1
+            while f"{username}_{idx}".lower() in taken:
+                idx += 1
+            model.unique_user_name = f"{username}_{idx}"
+            taken.add(model.unique_user_name.lower())
 
 
 class ChaturbateService(ScrapingService):
     """Chaturbate scraping service"""
 
+    source = Config.SOURCE_CHATURBATE
+    items_path = 'results.item'
+
+    def item_id(self, item: Dict) -> Optional[str]:
+        return item.get('username')
+
     def parse_data(self, data: List[Dict], config: Config) -> Dict:
         """Parse Chaturbate API response"""
         results = {}
 
-        for item in data:
+        for item in self.extract_items(data):
             username = item.get('username')
             if not username:
                 continue
@@ -207,27 +589,22 @@ class ChaturbateService(ScrapingService):
 
         return results
 
-    def extract_tags(self, data: List[Dict], config: Config) -> Dict[str, List[str]]:
-        """Extract tags from Chaturbate data"""
-        tags_map = {}
-        for item in data:
-            username = item.get('username')
-            tags = item.get('tags', [])
-            if username and tags:
-                tags_map[username] = tags
-        return tags_map
-
 
 class StripcashService(ScrapingService):
     """Stripcash scraping service"""
 
+    source = Config.SOURCE_STRIPCASH
+    items_path = 'models.item'
+
+    def item_id(self, item: Dict) -> Optional[str]:
+        return str(item['id']) if item.get('id') else None
+
     def parse_data(self, data: Dict, config: Config) -> Dict:
         """Parse Stripcash API response"""
         results = {}
-        models_data = data.get('models', [])
+        models_data = self.extract_items(data)
 
         # Get userId from config
-        import json
         config_data = {}
         try:
             config_data = json.loads(config.data) if config.data else {}
@@ -246,7 +623,7 @@ class StripcashService(ScrapingService):
             chat_url = f"https://go.gldrdr.com/?userId={user_id}&path=/cams/{username}"
             iframe_url = f"https://go.schjmpl.com/?userId={user_id}&refreshRate=60&hasPlayer=true&hasLive=true&hasName=true&path={username}"
 
-            results[model_id] = {
+            results[str(model_id)] = {
                 'model_id': str(model_id),
                 'user_name': username,
                 'unique_user_name': username,
@@ -266,25 +643,23 @@ class StripcashService(ScrapingService):
 
         return results
 
-    def extract_tags(self, data: Dict, config: Config) -> Dict[str, List[str]]:
-        """Extract tags from Stripcash data"""
-        tags_map = {}
-        models_data = data.get('models', [])
-        for item in models_data:
-            username = item.get('username')
-            tags = item.get('tags', [])
-            if username and tags:
-                tags_map[username] = tags
-        return tags_map
-
 
 class XLoveCashService(ScrapingService):
     """XLoveCash scraping service"""
 
+    source = Config.SOURCE_XLOVECASH
+    items_path = 'content.models_list.item'
+    tags_key = 'tagList'
+    # Profile details endpoint, queried with up to 100 model ids per request
+    profile_url = 'https://webservice-affiliate.xlovecam.com/model/getprofileinfo/'
+
+    def item_id(self, item: Dict) -> Optional[str]:
+        return str(item['model_id']) if item.get('model_id') else None
+
     def parse_data(self, data: Dict, config: Config) -> Dict:
         """Parse XLoveCash API response"""
         results = {}
-        models_list = data.get('content', {}).get('models_list', [])
+        models_list = self.extract_items(data)
 
         for item in models_list:
             model_id = item.get('model_id')
@@ -295,7 +670,7 @@ class XLoveCashService(ScrapingService):
             if image_url.startswith('http://'):
                 image_url = 'https://' + image_url.replace('http://', '')
 
-            results[model_id] = {
+            results[str(model_id)] = {
                 'model_id': str(model_id),
                 'user_name': item.get('nick', ''),
                 'unique_user_name': item.get('nick', ''),
@@ -321,21 +696,20 @@ class XLoveCashService(ScrapingService):
 
     def _update_xlovecash_profiles(self, results: Dict, config: Config):
         """Get detailed profile information for XLoveCash models"""
-        model_ids = list(results.keys())
         chunk_size = 100
+        chunks = list(chunked(results.keys(), chunk_size))
 
-        # Process in chunks
-        for i in range(0, len(model_ids), chunk_size):
-            chunk = model_ids[i:i + chunk_size]
+        # Create temporary config for profile endpoint
+        profile_config = Config(
+            method='POST',
+            api_url=self.profile_url,
+            data=config.data
+        )
 
-            # Create temporary config for profile endpoint
-            profile_config = Config(
-                method='POST',
-                api_url='https://webservice-affiliate.xlovecam.com/model/getprofileinfo/',
-                data=config.data
-            )
+        # Fetch all chunks concurrently
+        responses = self.get_data_many(profile_config, [{'modelid': chunk} for chunk in chunks])
 
-            profile_data = self.get_data(profile_config, {'modelid': chunk})
+        for profile_data in responses:
             if profile_data and 'content' in profile_data:
                 for model_id, info in profile_data['content'].items():
                     if model_id in results:
@@ -348,27 +722,20 @@ class XLoveCashService(ScrapingService):
                             'description': info_by_lang.get('description', ''),
                         })
 
-    def extract_tags(self, data: Dict, config: Config) -> Dict[str, List[str]]:
-        """Extract tags from XLoveCash data"""
-        tags_map = {}
-        models_list = data.get('content', {}).get('models_list', [])
-        for item in models_list:
-            model_id = item.get('model_id')
-            tags = item.get('tagList', [])
-            if model_id and tags:
-                tags_map[str(model_id)] = tags
-        return tags_map
-
 
 class BongaCashService(ScrapingService):
     """BongaCash scraping service"""
 
+    source = Config.SOURCE_BONGACASH
+
+    def item_id(self, item: Dict) -> Optional[str]:
+        return item.get('username')
+
     def parse_data(self, data: List[Dict], config: Config) -> Dict:
         """Parse BongaCash API response"""
         results = {}
 
         # Get config data for chat URL
-        import json
         config_data = {}
         try:
             config_data = json.loads(config.data) if config.data else {}
@@ -378,7 +745,7 @@ class BongaCashService(ScrapingService):
         c_param = config_data.get('c', '')
         chat_url_template = f"https://bngpt.com/promo.php?type=direct_link&v=2&c={c_param}&amute=1&models[]=%s&model_offline=profile"
 
-        for item in data:
+        for item in self.extract_items(data):
             username = item.get('username')
             if not username:
                 continue
@@ -407,16 +774,6 @@ class BongaCashService(ScrapingService):
 
         return results
 
-    def extract_tags(self, data: List[Dict], config: Config) -> Dict[str, List[str]]:
-        """Extract tags from BongaCash data"""
-        tags_map = {}
-        for item in data:
-            username = item.get('username')
-            tags = item.get('tags', [])
-            if username and tags:
-                tags_map[username] = tags
-        return tags_map
-
 
 # Service factory
 def get_scraping_service(source: str) -> ScrapingService:
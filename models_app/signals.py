@@ -0,0 +1,40 @@
+"""
+Keep the Redis subscription index in step with Subscription rows.
+Covers the subscribe/unsubscribe views and admin edits; queryset.update()
+calls don't fire signals, so they must not touch is_active or model.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import subscription_index
+from .models import Subscription
+
+
+@receiver(pre_save, sender=Subscription)
+def remember_indexed_model(sender, instance, **kwargs):
+    # An admin edit can move a subscription to another model; the old model's set must drop it
+    instance._indexed_model_id = None
+    if instance.pk:
+        instance._indexed_model_id = (
+            Subscription.objects.filter(pk=instance.pk).values_list('model_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Subscription)
+def index_subscription(sender, instance, **kwargs):
+    previous_model_id = getattr(instance, '_indexed_model_id', None)
+
+    def sync():
+        if previous_model_id is not None and previous_model_id != instance.model_id:
+            subscription_index.remove_subscription(instance.id, previous_model_id)
+        subscription_index.sync_subscription(instance)
+
+    # Wait for the commit so a rolled-back subscribe never reaches the index
+    transaction.on_commit(sync)
+
+
+@receiver(post_delete, sender=Subscription)
+def unindex_subscription(sender, instance, **kwargs):
+    subscription_id, model_id = instance.id, instance.model_id
+    transaction.on_commit(lambda: subscription_index.remove_subscription(subscription_id, model_id))
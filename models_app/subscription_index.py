@@ -0,0 +1,293 @@
+"""
+Redis inverted index of active subscriptions.
+subs:models holds the ids of models with at least one active subscription and
+subs:model:<id> the active subscription ids of each model, so the nudity
+scheduler and notification fan-out don't scan the subscriptions table.
+Kept current by Subscription signals; rebuild with manage.py rebuild_subscription_index.
+Readers get None whenever the index is unavailable and fall back to the database.
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MODELS_KEY = 'subs:models'
+MODEL_KEY = 'subs:model:%s'
+# Set once a full rebuild has completed; until then readers use the database
+READY_KEY = 'subs:ready'
+# While a rebuild runs, signal writes also go to its temporary keys and are logged for reconciling
+REBUILD_KEY = 'subs:rebuilding'
+REBUILD_SUFFIX = ':rebuild'
+DIRTY_KEY = 'subs:dirty'
+REBUILD_TTL = 3600
+
+# KEYS: model set, models set, rebuild marker, temp model set, temp models set, dirty log
+# ARGV: subscription id, model id
+ADD_SCRIPT = """
+redis.call('SADD', KEYS[1], ARGV[1])
+redis.call('SADD', KEYS[2], ARGV[2])
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('SADD', KEYS[4], ARGV[1])
+    redis.call('SADD', KEYS[5], ARGV[2])
+    redis.call('SADD', KEYS[6], ARGV[1] .. ':' .. ARGV[2])
+end
+return 1
+"""
+
+# Remove a subscription, and drop the model from the models set once it has none left
+REMOVE_SCRIPT = """
+redis.call('SREM', KEYS[1], ARGV[1])
+if redis.call('SCARD', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[2])
+end
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('SREM', KEYS[4], ARGV[1])
+    if redis.call('SCARD', KEYS[4]) == 0 then
+        redis.call('SREM', KEYS[5], ARGV[2])
+    end
+    redis.call('SADD', KEYS[6], ARGV[1] .. ':' .. ARGV[2])
+end
+return 1
+"""
+
+# Swap the temporary keys in, unless subscriptions changed since the last reconcile (returns 0).
+# ARGV: models key, model key prefix, temp suffix, ready key, rebuild marker, dirty log.
+# Keys are built in the script, which is fine on the single Redis instance the index lives on.
+SWAP_SCRIPT = """
+local models, prefix, suffix = ARGV[1], ARGV[2], ARGV[3]
+if redis.call('EXISTS', ARGV[6]) == 1 then
+    return 0
+end
+local new_models = {}
+for _, model_id in ipairs(redis.call('SMEMBERS', models .. suffix)) do
+    if redis.call('EXISTS', prefix .. model_id .. suffix) == 1 then
+        redis.call('RENAME', prefix .. model_id .. suffix, prefix .. model_id)
+        new_models[model_id] = true
+    else
+        redis.call('SREM', models .. suffix, model_id)
+    end
+end
+for _, model_id in ipairs(redis.call('SMEMBERS', models)) do
+    if not new_models[model_id] then
+        redis.call('DEL', prefix .. model_id)
+    end
+end
+if redis.call('EXISTS', models .. suffix) == 1 then
+    redis.call('RENAME', models .. suffix, models)
+else
+    redis.call('DEL', models)
+end
+redis.call('SET', ARGV[4], 1)
+redis.call('DEL', ARGV[5])
+return 1
+"""
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> Optional[redis.Redis]:
+    """Shared redis-py client for the index, or None when the index is disabled"""
+    global _client
+    if not getattr(settings, 'SUBSCRIPTION_INDEX_ENABLED', True):
+        return None
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    getattr(settings, 'SUBSCRIPTION_INDEX_REDIS_URL', 'redis://127.0.0.1:6379/2'),
+                    socket_timeout=2,
+                    socket_connect_timeout=2,
+                )
+    return _client
+
+
+def is_ready(client: redis.Redis) -> bool:
+    return bool(client.exists(READY_KEY))
+
+
+def add_subscription(subscription_id: int, model_id: int):
+    """Index an active subscription"""
+    client = get_client()
+    if client is None:
+        return
+    try:
+        client.eval(ADD_SCRIPT, 6, *_script_keys(model_id), subscription_id, model_id)
+    except redis.RedisError as e:
+        logger.warning(f"Could not index subscription {subscription_id}: {e}")
+
+
+def remove_subscription(subscription_id: int, model_id: int):
+    """Drop an inactive or deleted subscription from the index"""
+    client = get_client()
+    if client is None:
+        return
+    try:
+        client.eval(REMOVE_SCRIPT, 6, *_script_keys(model_id), subscription_id, model_id)
+    except redis.RedisError as e:
+        logger.warning(f"Could not unindex subscription {subscription_id}: {e}")
+
+
+def _script_keys(model_id: int) -> List[str]:
+    return [
+        MODEL_KEY % model_id, MODELS_KEY, REBUILD_KEY,
+        MODEL_KEY % model_id + REBUILD_SUFFIX, MODELS_KEY + REBUILD_SUFFIX, DIRTY_KEY,
+    ]
+
+
+def _mark_incomplete(client: redis.Redis, reason: str):
+    """Stop trusting the index (e.g. sets evicted under memory pressure) until the next rebuild"""
+    logger.warning(f"Subscription index incomplete ({reason}); using the database until it is rebuilt")
+    client.delete(READY_KEY)
+
+
+def sync_subscription(subscription):
+    """Index or unindex a subscription according to is_active"""
+    if subscription.is_active:
+        add_subscription(subscription.id, subscription.model_id)
+    else:
+        remove_subscription(subscription.id, subscription.model_id)
+
+
+def get_subscribed_model_ids() -> Optional[Set[int]]:
+    """Ids of models with active subscriptions, or None to query the database"""
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        counts = get_subscriber_counts()
+        return None if counts is None else set(counts)
+    except redis.RedisError as e:
+        logger.warning(f"Subscription index unavailable: {e}")
+        return None
+
+
+def get_subscriber_counts(model_ids: Iterable[int] = None) -> Optional[Dict[int, int]]:
+    """Active subscription count per subscribed model, or None to query the database"""
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        if not is_ready(client):
+            return None
+        indexed = {int(model_id) for model_id in client.smembers(MODELS_KEY)}
+        model_ids = list(indexed if model_ids is None else model_ids)
+
+        pipe = client.pipeline()
+        for model_id in model_ids:
+            pipe.scard(MODEL_KEY % model_id)
+        counts = dict(zip(model_ids, pipe.execute()))
+
+        # Every indexed model keeps a non-empty set; a missing one was evicted
+        if any(model_id in indexed and not count for model_id, count in counts.items()):
+            _mark_incomplete(client, 'subscription set missing')
+            return None
+        return {model_id: count for model_id, count in counts.items() if count}
+    except redis.RedisError as e:
+        logger.warning(f"Subscription index unavailable: {e}")
+        return None
+
+
+def get_subscription_ids(model_id: int) -> Optional[List[int]]:
+    """Sorted active subscription ids of a model, or None to query the database"""
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        if not is_ready(client):
+            return None
+        pipe = client.pipeline()
+        pipe.sismember(MODELS_KEY, model_id)
+        pipe.smembers(MODEL_KEY % model_id)
+        indexed, subscription_ids = pipe.execute()
+
+        if indexed and not subscription_ids:
+            _mark_incomplete(client, f"subscription set of model {model_id} missing")
+            return None
+        return sorted(int(sub_id) for sub_id in subscription_ids)
+    except redis.RedisError as e:
+        logger.warning(f"Subscription index unavailable: {e}")
+        return None
+
+
+def rebuild(batch_size: int = 5000) -> Dict[str, int]:
+    """
+    Rebuild the whole index from the database.
+    New sets are written under temporary keys and swapped in atomically, so
+    readers never see a half-built index. Subscriptions changed while the
+    rebuild runs are written to the temporary keys too and re-read from the
+    database before the swap, so the swap never overwrites them.
+    Returns: {'models': int, 'subscriptions': int}
+    """
+    from .models import Subscription
+
+    client = get_client()
+    if client is None:
+        raise RuntimeError('Subscription index is disabled (SUBSCRIPTION_INDEX_ENABLED=False)')
+
+    # Clear leftovers of an interrupted rebuild, then route signal writes to the temporary keys too
+    for key in client.scan_iter(match=f"subs:*{REBUILD_SUFFIX}"):
+        client.delete(key)
+    client.delete(DIRTY_KEY)
+    client.set(REBUILD_KEY, 1, ex=REBUILD_TTL)
+
+    try:
+        model_ids = set()
+        subscription_count = 0
+        rows = Subscription.objects.filter(is_active=True).order_by('id').values_list('id', 'model_id')
+        pipe = client.pipeline(transaction=False)
+        for subscription_id, model_id in rows.iterator(chunk_size=batch_size):
+            pipe.sadd(MODEL_KEY % model_id + REBUILD_SUFFIX, subscription_id)
+            model_ids.add(model_id)
+            subscription_count += 1
+            if subscription_count % batch_size == 0:
+                pipe.execute()
+        if model_ids:
+            pipe.sadd(MODELS_KEY + REBUILD_SUFFIX, *model_ids)
+        pipe.execute()
+
+        # Re-read subscriptions that changed meanwhile until none changed during the swap
+        while True:
+            _reconcile_changed(client)
+            if client.eval(SWAP_SCRIPT, 0, MODELS_KEY, MODEL_KEY.replace('%s', ''), REBUILD_SUFFIX,
+                           READY_KEY, REBUILD_KEY, DIRTY_KEY):
+                break
+    finally:
+        client.delete(REBUILD_KEY)
+
+    counts = {'models': client.scard(MODELS_KEY), 'subscriptions': subscription_count}
+    logger.info(f"Rebuilt subscription index: {counts['models']} models, {counts['subscriptions']} subscriptions")
+    return counts
+
+
+def _reconcile_changed(client: redis.Redis):
+    """Apply the database state of subscriptions logged as changed to the temporary keys"""
+    from .models import Subscription
+
+    processing = DIRTY_KEY + REBUILD_SUFFIX
+    try:
+        client.rename(DIRTY_KEY, processing)
+    except redis.ResponseError:
+        # Nothing changed
+        return
+
+    changed = [entry.decode().split(':') for entry in client.smembers(processing)]
+    active = set(
+        Subscription.objects.filter(id__in={int(sub_id) for sub_id, _ in changed}, is_active=True)
+        .values_list('id', 'model_id')
+    )
+
+    pipe = client.pipeline(transaction=False)
+    for sub_id, model_id in changed:
+        if (int(sub_id), int(model_id)) in active:
+            pipe.sadd(MODEL_KEY % model_id + REBUILD_SUFFIX, sub_id)
+            pipe.sadd(MODELS_KEY + REBUILD_SUFFIX, model_id)
+        else:
+            pipe.srem(MODEL_KEY % model_id + REBUILD_SUFFIX, sub_id)
+    pipe.delete(processing)
+    pipe.execute()
@@ -4,10 +4,12 @@ Converted from Laravel Jobs with full implementation.
 """
 from celery import shared_task
 import logging
+import time
 from django.utils import timezone
 from django.db import transaction
 
 from .models import WebcamModel
+from .pipeline import ScrapePipeline
 from .services import (
     ChaturbateService, StripcashService,
     XLoveCashService, BongaCashService,
@@ -34,12 +36,11 @@ def get_data_from_chaturbate(limit=100):
             logger.warning("No active Chaturbate config found")
             return
 
-        service = ChaturbateService()
-        data = service.get_data(config, {'limit': limit})
+        pipeline = ScrapePipeline(ChaturbateService(), config, update_status=False, sync_categories=False)
+        report = pipeline.run({'limit': limit})
 
-        if data:
-            service.save_data(data, config)
-            logger.info(f"Successfully fetched Chaturbate data: {len(data)} models")
+        if report['models']:
+            logger.info(f"Successfully fetched Chaturbate data: {report['models']} models")
         else:
             logger.warning("No data received from Chaturbate")
 
@@ -61,23 +62,13 @@ def update_chaturbate_data(limit=100):
         if not config:
             return
 
-        service = ChaturbateService()
-        data = service.get_data(config, {'limit': limit})
-
-        if data:
-            # Handle nested response
-            models_list = data.get('results', []) if isinstance(data, dict) else data
-
-            # Extract model IDs for online status update
-            model_ids = [item.get('username') for item in models_list if item.get('username')]
+        # Fetch once, then save models, sync categories and update online/offline status
+        report = ScrapePipeline(ChaturbateService(), config).run({'limit': limit})
 
-            # Update models
-            service.save_data(data, config)
+        if report['models']:
+            logger.info(f"Updated Chaturbate: {report['models']} models")
 
-            # Update online/offline status
-            service.update_online_status(model_ids, Config.SOURCE_CHATURBATE)
-
-            logger.info(f"Updated Chaturbate: {len(models_list)} models")
+        return report
 
     except Exception as e:
         logger.error(f"Error updating Chaturbate data: {str(e)}", exc_info=True)
@@ -85,7 +76,11 @@ def update_chaturbate_data(limit=100):
 
 @shared_task
 def update_chaturbate_categories():
-    """Update categories for Chaturbate models"""
+    """
+    Update categories for Chaturbate models.
+    update_chaturbate_data already syncs categories in the same pass; this
+    task is kept for manual backfills.
+    """
     logger.info("Updating Chaturbate categories")
 
     try:
@@ -98,11 +93,10 @@ def update_chaturbate_categories():
             return
 
         service = ChaturbateService()
-        data = service.get_data(config, {'limit': 100})
+        for batch in service.iter_batches(config, {'limit': 100}):
+            service.update_categories(batch, config)
 
-        if data:
-            service.update_categories(data, config)
-            logger.info("Updated Chaturbate categories")
+        logger.info("Updated Chaturbate categories")
 
     except Exception as e:
         logger.error(f"Error updating Chaturbate categories: {str(e)}", exc_info=True)
@@ -124,12 +118,11 @@ def get_data_from_stripcash(limit=100):
             logger.warning("No active Stripcash config found")
             return
 
-        service = StripcashService()
-        data = service.get_data(config, {'limit': limit})
+        pipeline = ScrapePipeline(StripcashService(), config, update_status=False, sync_categories=False)
+        report = pipeline.run({'limit': limit})
 
-        if data and 'models' in data:
-            service.save_data(data, config)
-            logger.info(f"Successfully fetched Stripcash data: {len(data.get('models', []))} models")
+        if report['models']:
+            logger.info(f"Successfully fetched Stripcash data: {report['models']} models")
 
     except Exception as e:
         logger.error(f"Error fetching Stripcash data: {str(e)}", exc_info=True)
@@ -149,17 +142,13 @@ def update_stripcash_data(limit=100):
         if not config:
             return
 
-        service = StripcashService()
-        data = service.get_data(config, {'limit': limit})
-
-        if data and 'models' in data:
-            models_data = data.get('models', [])
-            model_ids = [str(item.get('id')) for item in models_data if item.get('id')]
+        # Fetch once, then save models, sync categories and update online/offline status
+        report = ScrapePipeline(StripcashService(), config).run({'limit': limit})
 
-            service.save_data(data, config)
-            service.update_online_status(model_ids, Config.SOURCE_STRIPCASH)
+        if report['models']:
+            logger.info(f"Updated Stripcash: {report['models']} models")
 
-            logger.info(f"Updated Stripcash: {len(models_data)} models")
+        return report
 
     except Exception as e:
         logger.error(f"Error updating Stripcash data: {str(e)}", exc_info=True)
@@ -167,7 +156,11 @@ def update_stripcash_data(limit=100):
 
 @shared_task
 def update_stripcash_categories():
-    """Update categories for Stripcash models"""
+    """
+    Update categories for Stripcash models.
+    update_stripcash_data already syncs categories in the same pass; this
+    task is kept for manual backfills.
+    """
     logger.info("Updating Stripcash categories")
 
     try:
@@ -180,11 +173,10 @@ def update_stripcash_categories():
             return
 
         service = StripcashService()
-        data = service.get_data(config)
+        for batch in service.iter_batches(config):
+            service.update_categories(batch, config)
 
-        if data:
-            service.update_categories(data, config)
-            logger.info("Updated Stripcash categories")
+        logger.info("Updated Stripcash categories")
 
     except Exception as e:
         logger.error(f"Error updating Stripcash categories: {str(e)}", exc_info=True)
@@ -206,13 +198,11 @@ def get_data_from_xlovecash(limit=100):
             logger.warning("No active XLoveCash config found")
             return
 
-        service = XLoveCashService()
-        data = service.get_data(config, {'limit': limit})
+        pipeline = ScrapePipeline(XLoveCashService(), config, update_status=False, sync_categories=False)
+        report = pipeline.run({'limit': limit})
 
-        if data and 'content' in data:
-            service.save_data(data, config)
-            models_count = len(data.get('content', {}).get('models_list', []))
-            logger.info(f"Successfully fetched XLoveCash data: {models_count} models")
+        if report['models']:
+            logger.info(f"Successfully fetched XLoveCash data: {report['models']} models")
 
     except Exception as e:
         logger.error(f"Error fetching XLoveCash data: {str(e)}", exc_info=True)
@@ -232,17 +222,13 @@ def update_xlovecash_data(limit=100):
         if not config:
             return
 
-        service = XLoveCashService()
-        data = service.get_data(config, {'limit': limit})
-
-        if data and 'content' in data:
-            models_list = data.get('content', {}).get('models_list', [])
-            model_ids = [str(item.get('model_id')) for item in models_list if item.get('model_id')]
+        # Fetch once, then save models, sync categories and update online/offline status
+        report = ScrapePipeline(XLoveCashService(), config).run({'limit': limit})
 
-            service.save_data(data, config)
-            service.update_online_status(model_ids, Config.SOURCE_XLOVECASH)
+        if report['models']:
+            logger.info(f"Updated XLoveCash: {report['models']} models")
 
-            logger.info(f"Updated XLoveCash: {len(models_list)} models")
+        return report
 
     except Exception as e:
         logger.error(f"Error updating XLoveCash data: {str(e)}", exc_info=True)
@@ -250,7 +236,11 @@ def update_xlovecash_data(limit=100):
 
 @shared_task
 def update_xlovecash_categories():
-    """Update categories for XLoveCash models"""
+    """
+    Update categories for XLoveCash models.
+    update_xlovecash_data already syncs categories in the same pass; this
+    task is kept for manual backfills.
+    """
     logger.info("Updating XLoveCash categories")
 
     try:
@@ -263,11 +253,10 @@ def update_xlovecash_categories():
             return
 
         service = XLoveCashService()
-        data = service.get_data(config)
+        for batch in service.iter_batches(config):
+            service.update_categories(batch, config)
 
-        if data:
-            service.update_categories(data, config)
-            logger.info("Updated XLoveCash categories")
+        logger.info("Updated XLoveCash categories")
 
     except Exception as e:
         logger.error(f"Error updating XLoveCash categories: {str(e)}", exc_info=True)
@@ -289,12 +278,11 @@ def get_data_from_bongacash(limit=100):
             logger.warning("No active BongaCash config found")
             return
 
-        service = BongaCashService()
-        data = service.get_data(config, {'limit': limit})
+        pipeline = ScrapePipeline(BongaCashService(), config, update_status=False, sync_categories=False)
+        report = pipeline.run({'limit': limit})
 
-        if data:
-            service.save_data(data, config)
-            logger.info(f"Successfully fetched BongaCash data: {len(data)} models")
+        if report['models']:
+            logger.info(f"Successfully fetched BongaCash data: {report['models']} models")
 
     except Exception as e:
         logger.error(f"Error fetching BongaCash data: {str(e)}", exc_info=True)
@@ -314,16 +302,13 @@ def update_bongacash_data(limit=100):
         if not config:
             return
 
-        service = BongaCashService()
-        data = service.get_data(config, {'limit': limit})
-
-        if data:
-            model_ids = [item.get('username') for item in data if item.get('username')]
+        # Fetch once, then save models, sync categories and update online/offline status
+        report = ScrapePipeline(BongaCashService(), config).run({'limit': limit})
 
-            service.save_data(data, config)
-            service.update_online_status(model_ids, Config.SOURCE_BONGACASH)
+        if report['models']:
+            logger.info(f"Updated BongaCash: {report['models']} models")
 
-            logger.info(f"Updated BongaCash: {len(data)} models")
+        return report
 
     except Exception as e:
         logger.error(f"Error updating BongaCash data: {str(e)}", exc_info=True)
@@ -331,7 +316,11 @@ def update_bongacash_data(limit=100):
 
 @shared_task
 def update_bongacash_categories():
-    """Update categories for BongaCash models"""
+    """
+    Update categories for BongaCash models.
+    update_bongacash_data already syncs categories in the same pass; this
+    task is kept for manual backfills.
+    """
     logger.info("Updating BongaCash categories")
 
     try:
@@ -344,11 +333,10 @@ def update_bongacash_categories():
             return
 
         service = BongaCashService()
-        data = service.get_data(config)
+        for batch in service.iter_batches(config):
+            service.update_categories(batch, config)
 
-        if data:
-            service.update_categories(data, config)
-            logger.info("Updated BongaCash categories")
+        logger.info("Updated BongaCash categories")
 
     except Exception as e:
         logger.error(f"Error updating BongaCash categories: {str(e)}", exc_info=True)
@@ -379,6 +367,23 @@ def update_online_status():
         logger.error(f"Error updating online status: {str(e)}", exc_info=True)
 
 
+@shared_task
+def prune_model_status_events(days=None):
+    """Delete online/offline transition events older than the retention window"""
+    from django.conf import settings
+    from .models import ModelStatusEvent
+
+    try:
+        days = days or int(getattr(settings, 'MODEL_STATUS_EVENT_RETENTION_DAYS', 7))
+        threshold = timezone.now() - timezone.timedelta(days=days)
+        deleted, _ = ModelStatusEvent.objects.filter(created_at__lt=threshold).delete()
+        logger.info(f"Pruned {deleted} model status events older than {days} days")
+        return deleted
+    except Exception as e:
+        logger.error(f"Error pruning model status events: {e}", exc_info=True)
+        return 0
+
+
 @shared_task
 def scrape_all_platforms(limit=100):
     """Scrape all active platforms at once"""
@@ -394,38 +399,23 @@ def scrape_all_platforms(limit=100):
 
 @shared_task
 def check_subscribed_models_for_nudity():
-    """Check nudity for models with active subscriptions (memory-optimized for t3.small)"""
-    from .models import Subscription, WebcamModel
+    """
+    Check nudity for models with active subscriptions (memory-optimized for t3.small).
+    Models are ranked by expected value and the run is sized to measured detector throughput.
+    """
     from django.conf import settings
+    from .nudity_scheduler import NudityCheckScheduler
 
     try:
-        # Get unique model IDs with active subscriptions
-        subscribed_model_ids = Subscription.objects.filter(
-            is_active=True
-        ).values_list('model_id', flat=True).distinct()
+        model_ids = NudityCheckScheduler().select()
 
-        # Get online models that are subscribed
-        models = WebcamModel.objects.filter(
-            id__in=subscribed_model_ids,
-            is_online=True
-        )
+        # Queue batched checks; each task runs a few inference passes so it can
+        # prefetch the next batch of snapshots while the current one is checked
+        batch_size = int(getattr(settings, 'NUDITY_BATCH_SIZE', 8))
+        task_size = batch_size * int(getattr(settings, 'NUDITY_BATCHES_PER_TASK', 4))
 
-        total_count = models.count()
-
-        # Memory optimization: Limit batch size for t3.small
-        # Max 20 checks per run to prevent memory exhaustion
-        max_checks = int(getattr(settings, 'MAX_NUDITY_CHECKS_PER_RUN', 20))
-
-        if total_count > max_checks:
-            # Prioritize models that haven't been checked recently
-            models = models.order_by('nudity_last_check')[:max_checks]
-            logger.info(f"Limited nudity checks to {max_checks} out of {total_count} subscribed models")
-        else:
-            logger.info(f"Checking nudity for {total_count} subscribed models")
-
-        # Queue individual checks (they will run sequentially due to CELERY_WORKER_CONCURRENCY=2)
-        for model in models:
-            check_model_nudity.delay(model.id)
+        for i in range(0, len(model_ids), task_size):
+            check_models_nudity_batch.delay(model_ids[i:i + task_size])
 
     except Exception as e:
         logger.error(f"Error in check_subscribed_models_for_nudity: {e}", exc_info=True)
@@ -434,93 +424,168 @@ def check_subscribed_models_for_nudity():
 @shared_task
 def check_model_nudity(model_id):
     """Check if a specific model is showing nudity"""
+    return check_models_nudity_batch([model_id])
+
+
+@shared_task
+def check_models_nudity_batch(model_ids):
+    """
+    Check models for nudity, one batched inference pass per NUDITY_BATCH_SIZE models.
+    Snapshots for the next batch download while the current batch is checked.
+    """
+    from django.conf import settings
     from .models import WebcamModel
     from .nudity_detector import NudityDetectionService
+    from .nudity_scheduler import record_check_throughput, schedule_next_check
 
+    started = time.perf_counter()
     try:
-        model = WebcamModel.objects.get(id=model_id)
+        models = list(WebcamModel.objects.filter(id__in=model_ids))
+
+        missing = set(model_ids) - {model.id for model in models}
+        for model_id in missing:
+            logger.error(f"Model {model_id} not found")
+
+        # Skip models without an image
+        for model in models:
+            if not model.image:
+                logger.warning(f"Model {model.display_name} has no image URL")
+        models = [model for model in models if model.image]
 
-        # Skip if no image
-        if not model.image:
-            logger.warning(f"Model {model.display_name} has no image URL")
+        if not models:
             return
 
-        # Skip if image hasn't changed (check hash)
         detector = NudityDetectionService()
+        batch_size = int(getattr(settings, 'NUDITY_BATCH_SIZE', 8))
+        batches = [models[i:i + batch_size] for i in range(0, len(models), batch_size)]
+
+        # Check nudity batch by batch (hash-first, so unchanged images skip inference)
+        results = []
+        pending = detector.start_downloads([model.image for model in batches[0]])
+        for i, batch in enumerate(batches):
+            downloads = detector.collect_downloads(pending)
+            if i + 1 < len(batches):
+                pending = detector.start_downloads([model.image for model in batches[i + 1]])
+
+            results.extend(detector.check_model_images(
+                [model.image for model in batch],
+                known_hashes=[model.nudity_image_hash for model in batch],
+                known_phashes=[model.nudity_phash for model in batch],
+                downloads=downloads,
+            ))
+
+        now = timezone.now()
+        updated_models = []
+        unchanged_models = []
+        similar_models = []
+        failed_models = []
+        naked_model_ids = []
+
+        for model, result in zip(models, results):
+            # Skip if same image as before (no change)
+            if result['status'] == NudityDetectionService.RESULT_UNCHANGED:
+                logger.debug(f"Model {model.display_name} image unchanged, skipping")
+                model.nudity_last_check = now
+                schedule_next_check(model, now, changed=False)
+                unchanged_models.append(model)
+                continue
+
+            # Visually near-identical to the last checked frame: keep the previous verdict
+            if result['status'] == NudityDetectionService.RESULT_SIMILAR:
+                logger.debug(f"Model {model.display_name} frame similar to last check, reusing verdict")
+                model.nudity_last_check = now
+                model.nudity_image_hash = result['image_hash']
+                schedule_next_check(model, now, changed=False)
+                similar_models.append(model)
+                continue
+
+            # Download, decode or detection failed: keep the previous verdict and reference frame,
+            # and keep the current pace
+            if result['status'] == NudityDetectionService.RESULT_FAILED:
+                logger.debug(f"Model {model.display_name} check failed, keeping previous verdict")
+                model.nudity_last_check = now
+                schedule_next_check(model, now, changed=None)
+                failed_models.append(model)
+                continue
+
+            is_naked, confidence = result['is_naked'], result['confidence']
+
+            # Update model
+            model.is_naked = is_naked
+            model.nudity_confidence = confidence
+            model.nudity_last_check = now
+            model.nudity_image_hash = result['image_hash']
+            model.nudity_phash = result['phash']
+            # New imagery re-checks soon
+            schedule_next_check(model, now, changed=True)
+            updated_models.append(model)
+
+            confidence_str = f"{confidence:.2f}" if confidence is not None else "N/A"
+            logger.info(
+                f"Model {model.display_name}: is_naked={is_naked}, "
+                f"confidence={confidence_str}"
+            )
 
-        # Check nudity
-        is_naked, confidence, image_hash = detector.check_model_image(model.image)
+            if is_naked:
+                naked_model_ids.append(model.id)
 
-        # Skip if same image as before (no change)
-        if image_hash and model.nudity_image_hash == image_hash:
-            logger.debug(f"Model {model.display_name} image unchanged, skipping")
-            return
+        backoff_fields = ['nudity_check_interval', 'nudity_next_check']
+        WebcamModel.objects.bulk_update(updated_models, [
+            'is_naked', 'nudity_confidence', 'nudity_last_check', 'nudity_image_hash', 'nudity_phash'
+        ] + backoff_fields)
+        WebcamModel.objects.bulk_update(unchanged_models + failed_models, ['nudity_last_check'] + backoff_fields)
+        WebcamModel.objects.bulk_update(similar_models, ['nudity_last_check', 'nudity_image_hash'] + backoff_fields)
+
+        # If naked, notify subscribers
+        for model_id in naked_model_ids:
+            notify_subscribers.delay(model_id)
 
-        # Update model
-        model.is_naked = is_naked
-        model.nudity_confidence = confidence
-        model.nudity_last_check = timezone.now()
-        model.nudity_image_hash = image_hash
-        model.save(update_fields=[
-            'is_naked', 'nudity_confidence', 'nudity_last_check', 'nudity_image_hash'
-        ])
+        # Feed the scheduler's budget with how long this batch actually took
+        record_check_throughput(len(models), time.perf_counter() - started)
 
-        confidence_str = f"{confidence:.2f}" if confidence is not None else "N/A"
+        stats = detector.get_cache_stats()
         logger.info(
-            f"Model {model.display_name}: is_naked={is_naked}, "
-            f"confidence={confidence_str}"
+            f"Nudity batch: checked {len(models)} models, {len(naked_model_ids)} naked "
+            f"(cache hit rate {stats['hit_rate']:.0%}: {stats['unchanged']} unchanged, "
+            f"{stats['similar']} similar, {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['prefiltered']} prefiltered)"
         )
 
-        # If naked, notify subscribers
-        if is_naked:
-            notify_subscribers.delay(model.id)
-
-    except WebcamModel.DoesNotExist:
-        logger.error(f"Model {model_id} not found")
     except Exception as e:
-        logger.error(f"Error checking model {model_id} nudity: {e}", exc_info=True)
+        logger.error(f"Error checking nudity for models {model_ids}: {e}", exc_info=True)
 
 
 @shared_task
 def notify_subscribers(model_id):
-    """Send notifications to all subscribers of a model"""
-    from .models import WebcamModel, Subscription, Notification
-    from django.db.models import Q
+    """
+    Send notifications to all subscribers of a model.
+    The due subscriptions are split into id-range shards of about
+    NOTIFICATION_SHARD_SIZE that workers fan out in parallel; a single shard
+    runs inline. Returns the number of subscriptions due.
+    """
+    from .models import WebcamModel
+    from .fanout import plan_shards, start_fanout
 
     try:
         model = WebcamModel.objects.get(id=model_id)
 
-        # Get subscriptions that need notification
-        # Don't notify if already notified in last 30 minutes
-        threshold = timezone.now() - timezone.timedelta(minutes=30)
+        now = timezone.now()
+        count, shards = plan_shards(model.id, now)
 
-        subscriptions = Subscription.objects.filter(
-            model=model,
-            is_active=True
-        ).filter(
-            Q(last_notified_at__isnull=True) |
-            Q(last_notified_at__lt=threshold)
-        )
+        logger.info(f"Notifying {count} subscribers for {model.display_name} in {len(shards)} shards")
+        if not shards:
+            return 0
 
-        count = subscriptions.count()
-        logger.info(f"Notifying {count} subscribers for {model.display_name}")
+        # Latency is measured from the check that found the model naked
+        fanout_id = start_fanout(model.id, model.nudity_last_check or now, len(shards))
 
-        for sub in subscriptions:
-            # Create notification record
-            notification = Notification.objects.create(
-                subscription=sub,
-                model=model,
-                notification_type=Notification.TYPE_EMAIL,
-                status=Notification.STATUS_PENDING
-            )
-
-            # Send email
-            if sub.notification_method in ['email', 'both']:
-                send_email_notification.delay(notification.id)
+        if len(shards) == 1:
+            notify_subscribers_shard(model.id, *shards[0], fanout_id=fanout_id)
+        else:
+            for first_id, last_id in shards:
+                notify_subscribers_shard.delay(model.id, first_id, last_id, fanout_id=fanout_id)
 
-            # Update last notified time
-            sub.last_notified_at = timezone.now()
-            sub.save(update_fields=['last_notified_at'])
+        return count
 
     except WebcamModel.DoesNotExist:
         logger.error(f"Model {model_id} not found")
@@ -529,88 +594,188 @@ def notify_subscribers(model_id):
 
 
 @shared_task
-def send_email_notification(notification_id):
-    """Send email notification to user"""
-    from .models import Notification
-    from django.core.mail import send_mail
+def notify_subscribers_shard(model_id, first_id, last_id, fanout_id=''):
+    """
+    Notify the due subscribers of a model whose subscription id is in [first_id, last_id]
+    (last_id None: no upper bound) as part of fan-out `fanout_id`.
+    Pages through the range by subscription id, NOTIFICATION_CHUNK_SIZE at a time, so
+    memory stays bounded: each page is locked and claimed with one UPDATE, its Notification
+    rows are bulk-inserted, and its emails are queued as one delivery task (or left for the
+    outbox dispatcher with NOTIFICATION_OUTBOX_ENABLED).
+    """
+    from .models import Subscription, Notification
+    from .fanout import add_pending, due_subscriptions, finish_shard
+    from .outbox import is_enabled as outbox_enabled
     from django.conf import settings
 
+    notified = 0
     try:
-        notification = Notification.objects.get(id=notification_id)
-        sub = notification.subscription
-        model = notification.model
-
-        # Get viewer count from JSON data
-        viewers = 'N/A'
-        if model.json_data and isinstance(model.json_data, dict):
-            viewers = model.json_data.get('num_users', 'N/A')
-
-        # Email subject
-        subject = f'🔥 {model.display_name} is live and naked!'
-
-        # Plain text message
-        plain_message = f"""
-Hi {sub.user.username},
-
-Your favorite model {model.display_name} is currently live and showing nudity!
-
-🔥 Watch now: {model.chat_url or 'https://chaturbate.com'}
-👥 Viewers: {viewers}
-📊 Nudity Confidence: {model.nudity_confidence * 100:.0f}%
-⏰ Detected: {timezone.now().strftime('%Y-%m-%d %H:%M')}
-
-Don't miss out!
+        chunk_size = int(getattr(settings, 'NOTIFICATION_CHUNK_SIZE', 200))
+        use_outbox = outbox_enabled()
+        now = timezone.now()
+        last_seen = first_id - 1
+
+        while True:
+            # Claim the page first so an overlapping run doesn't notify it twice: rows are
+            # locked while they are marked notified, and rows another run holds are skipped.
+            # The claim and the Notification rows commit together, so a crash can't leave
+            # subscribers marked notified without a notification
+            with transaction.atomic():
+                due = due_subscriptions(model_id, now).filter(id__gt=last_seen)
+                if last_id is not None:
+                    due = due.filter(id__lte=last_id)
+                page = list(
+                    due
+                    .select_for_update(skip_locked=True)
+                    .order_by('id')
+                    .values_list('id', 'notification_method')[:chunk_size]
+                )
+                if not page:
+                    break
+                last_seen = page[-1][0]
+
+                chunk = [sub_id for sub_id, _ in page]
+                Subscription.objects.filter(id__in=chunk).update(last_notified_at=now)
+
+                email_subscription_ids = {
+                    sub_id for sub_id, method in page
+                    if method in [Subscription.NOTIFICATION_EMAIL, Subscription.NOTIFICATION_BOTH]
+                }
+
+                notifications = Notification.objects.bulk_create([
+                    Notification(
+                        subscription_id=sub_id,
+                        model_id=model_id,
+                        notification_type=(
+                            Notification.TYPE_EMAIL if sub_id in email_subscription_ids else Notification.TYPE_SMS
+                        ),
+                        status=Notification.STATUS_PENDING,
+                        fanout_id=fanout_id
+                    )
+                    for sub_id in chunk
+                ])
+                notified += len(chunk)
+                transaction.on_commit(
+                    lambda count=len(email_subscription_ids): add_pending(fanout_id, count)
+                )
+
+                # The dispatcher picks the new rows up from the outbox
+                if use_outbox:
+                    continue
+
+                # MySQL doesn't return primary keys from bulk_create, so read them back
+                if all(notification.pk for notification in notifications):
+                    rows = [(notification.pk, notification.subscription_id) for notification in notifications]
+                else:
+                    rows = Notification.objects.filter(
+                        subscription_id__in=chunk,
+                        model_id=model_id,
+                        created_at__gte=now
+                    ).values_list('id', 'subscription_id')
+
+                # Send email once the rows are committed
+                notification_ids = [
+                    notification_id for notification_id, sub_id in rows
+                    if sub_id in email_subscription_ids
+                ]
+                if notification_ids:
+                    transaction.on_commit(lambda ids=notification_ids: send_email_notifications.delay(ids))
+
+        return notified
 
----
-To unsubscribe from {model.display_name}, visit: {settings.SITE_URL}/subscriptions/
+    except Exception as e:
+        logger.error(
+            f"Error notifying subscribers {first_id}-{last_id} for model {model_id}: {e}", exc_info=True
+        )
+        return notified
+    finally:
+        finish_shard(fanout_id)
 
-XShows - Live Webcam Notifications
-        """.strip()
 
-        # Send email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[sub.user.email],
-            fail_silently=False,
-        )
+@shared_task
+def send_email_notifications(notification_ids):
+    """
+    Deliver a chunk of email notifications over one SMTP connection.
+    The rows are claimed like the outbox dispatcher claims them (locked, rows
+    held elsewhere skipped, leased), so no row is sent by both paths; sent/failed
+    statuses are written in bulk.
+    Returns: {'sent': int, 'failed': int, 'seconds': float, 'per_second': float}
+    """
+    from collections import Counter
+    from .models import Notification
+    from .fanout import record_delivered
+    from .outbox import EmailChannel, OutboxDispatcher
 
-        # Update notification status
-        notification.status = Notification.STATUS_SENT
-        notification.sent_at = timezone.now()
-        notification.save(update_fields=['status', 'sent_at'])
+    started = time.perf_counter()
+    notifications = OutboxDispatcher(batch_size=len(notification_ids)).claim(notification_ids)
 
-        logger.info(f"✅ Email sent to {sub.user.email} for model {model.display_name}")
+    results = EmailChannel().send(notifications)
 
-    except Notification.DoesNotExist:
-        logger.error(f"Notification {notification_id} not found")
-    except Exception as e:
-        # Mark as failed
-        try:
-            notification = Notification.objects.get(id=notification_id)
+    sent_ids = [notification.id for notification in notifications if results.get(notification.id) is None]
+    failed = []
+    for notification in notifications:
+        if results.get(notification.id) is not None:
             notification.status = Notification.STATUS_FAILED
-            notification.error_message = str(e)
-            notification.save(update_fields=['status', 'error_message'])
-        except:
-            pass
+            notification.error_message = results[notification.id]
+            failed.append(notification)
+
+    # Update notification status
+    Notification.objects.filter(id__in=sent_ids).update(
+        status=Notification.STATUS_SENT,
+        sent_at=timezone.now(),
+        next_attempt_at=None
+    )
+    for notification in failed:
+        notification.next_attempt_at = None
+    Notification.objects.bulk_update(failed, ['status', 'error_message', 'next_attempt_at'])
+    record_delivered(Counter(notification.fanout_id for notification in notifications))
+
+    seconds = time.perf_counter() - started
+    metrics = {
+        'sent': len(sent_ids),
+        'failed': len(failed),
+        'seconds': round(seconds, 3),
+        'per_second': round(len(notifications) / seconds, 1) if seconds else 0.0,
+    }
+    logger.info(
+        f"✅ Email chunk: {metrics['sent']} sent, {metrics['failed']} failed "
+        f"of {len(notification_ids)} in {metrics['seconds']}s ({metrics['per_second']}/s)"
+    )
+    return metrics
+
 
-        logger.error(f"❌ Error sending email for notification {notification_id}: {e}", exc_info=True)
+@shared_task
+def send_email_notification(notification_id):
+    """Send email notification to user"""
+    return send_email_notifications([notification_id])
 
 
 @shared_task
 def cleanup_old_nudity_cache():
-    """Clean up old cached images (privacy)"""
-    from .nudity_detector import NudityDetectionService
+    """
+    Remove snapshots left in media/nudity_cache by older releases (privacy).
+    Nudity checks now run in memory, so this is only needed once after upgrading;
+    it is kept so existing beat entries in the database don't fail.
+    """
+    import os
+    from django.conf import settings
+
+    cache_dir = os.path.join(settings.BASE_DIR, 'media', 'nudity_cache')
+    if not os.path.isdir(cache_dir):
+        return 0
 
+    removed_count = 0
     try:
-        detector = NudityDetectionService()
-        removed_count = detector.cleanup_old_cache(max_age_hours=1)
-        logger.info(f"Cache cleanup: removed {removed_count} old images")
+        for filename in os.listdir(cache_dir):
+            file_path = os.path.join(cache_dir, filename)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+                removed_count += 1
+        logger.info(f"Cache cleanup: removed {removed_count} leftover images")
         return removed_count
     except Exception as e:
         logger.error(f"Error in cache cleanup: {e}", exc_info=True)
-        return 0
+        return removed_count
 
 
 # Twitter Bot Tasks
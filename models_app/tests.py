@@ -1,3 +1,452 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Config
+from .fanout import plan_shards
+from .fetcher import AsyncFetcher
+from .models import ModelStatusEvent, Notification, Subscription, WebcamModel
+from .nudity_scheduler import schedule_next_check
+from .outbox import CHANNELS, NotificationChannel, OutboxDispatcher, retry_delay
+from .services import ChaturbateService, XLoveCashService
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Local API stub.
+    GET /echo?n=..&delay=..  -> {"n": .., "query": {...}} after `delay` seconds
+    GET /error               -> 500
+    POST /profile            -> XLoveCash-style profile info for every posted modelid, after 0.1s
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if parts.path == '/error':
+            return self.respond(500, {'error': 'boom'})
+
+        self.server.enter()
+        try:
+            time.sleep(float(query.get('delay', 0)))
+        finally:
+            self.server.leave()
+        self.respond(200, {'n': query.get('n'), 'query': query})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        model_ids = parse_qs(body).get('modelid', [])
+        self.server.profile_requests.append(model_ids)
+
+        self.server.enter()
+        try:
+            time.sleep(0.1)
+        finally:
+            self.server.leave()
+
+        self.respond(200, {'content': {
+            model_id: {
+                'model': {'age': 20 + int(model_id) % 10, 'sex': 'F'},
+                'infoByLang': {'description': f'Model {model_id}'},
+            }
+            for model_id in model_ids
+        }})
+
+    def respond(self, status, payload):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.reset()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.profile_requests = []
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class StubServerTestCase(SimpleTestCase):
+    """Runs a local HTTP stub for the duration of the test class"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.reset()
+
+
+class AsyncFetcherTests(StubServerTestCase):
+
+    def test_fetch_all_preserves_request_order(self):
+        # Earlier requests answer last, so completion order is the reverse of request order
+        specs = [
+            ('GET', f"{self.server.url}/echo", {'params': {'n': n, 'delay': 0.05 * (4 - n)}})
+            for n in range(5)
+        ]
+        responses = AsyncFetcher(concurrency=5).fetch_all(specs)
+
+        self.assertEqual([response.json()['n'] for response in responses], ['0', '1', '2', '3', '4'])
+
+    def test_fetch_all_bounds_concurrency(self):
+        specs = [('GET', f"{self.server.url}/echo", {'params': {'n': n, 'delay': 0.1}}) for n in range(8)]
+        responses = AsyncFetcher(concurrency=3).fetch_all(specs)
+
+        self.assertEqual(len(responses), 8)
+        self.assertTrue(all(response.status_code == 200 for response in responses))
+        self.assertEqual(self.server.max_in_flight, 3)
+
+    def test_failed_request_returns_none(self):
+        # Nothing listens on port 9 locally
+        responses = AsyncFetcher(concurrency=2).fetch_all([
+            ('GET', f"{self.server.url}/echo", {'params': {'n': 1}}),
+            ('GET', 'http://127.0.0.1:9/', {'timeout': 2}),
+        ])
+
+        self.assertEqual(responses[0].json()['n'], '1')
+        self.assertIsNone(responses[1])
+
+
+class GetDataManyTests(StubServerTestCase):
+
+    def test_merges_config_data_and_preserves_order(self):
+        config = Config(method='GET', api_url=f"{self.server.url}/echo", data='{"limit": "10"}')
+        results = ChaturbateService().get_data_many(config, [{'n': n, 'delay': 0.05 * (3 - n)} for n in range(4)])
+
+        self.assertEqual([result['n'] for result in results], ['0', '1', '2', '3'])
+        self.assertTrue(all(result['query']['limit'] == '10' for result in results))
+
+    def test_failed_response_is_none_in_place(self):
+        service = ChaturbateService()
+        results = service.get_data_many(Config(method='GET', api_url=f"{self.server.url}/echo"), [{'n': 1}])
+        results += service.get_data_many(Config(method='GET', api_url=f"{self.server.url}/error"), [{'n': 2}])
+
+        self.assertEqual(results[0]['n'], '1')
+        self.assertIsNone(results[1])
+
+
+class XLoveCashProfileTests(StubServerTestCase):
+
+    def test_profiles_are_fetched_in_parallel_chunks(self):
+        results = {str(model_id): {'model_id': str(model_id)} for model_id in range(1, 251)}
+        config = Config(method='POST', api_url=f"{self.server.url}/list", data='{"authItemId": "1"}')
+
+        with patch.object(XLoveCashService, 'profile_url', f"{self.server.url}/profile"):
+            XLoveCashService()._update_xlovecash_profiles(results, config)
+
+        # 250 models -> chunks of 100, 100 and 50, one request each
+        self.assertEqual(sorted(len(model_ids) for model_ids in self.server.profile_requests), [50, 100, 100])
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertEqual(
+            sorted(model_id for model_ids in self.server.profile_requests for model_id in model_ids),
+            sorted(results)
+        )
+        self.assertEqual(results['42']['age'], 22)
+        self.assertEqual(results['42']['gender'], 'F')
+        self.assertEqual(results['250']['description'], 'Model 250')
+
+
+def create_model(model_id, source=Config.SOURCE_CHATURBATE, **fields):
+    fields.setdefault('user_name', model_id)
+    fields.setdefault('display_name', model_id)
+    return WebcamModel.objects.create(model_id=model_id, source=source, image='', json_data={}, **fields)
+
+
+@override_settings(SUBSCRIPTION_INDEX_ENABLED=False)
+class SubscriberTestCase(TestCase):
+    """A model with subscribers, without the Redis subscription index"""
+
+    def setUp(self):
+        cache.clear()
+        self.model = create_model('m1', is_naked=True)
+
+    def subscribe(self, count, **fields):
+        User = get_user_model()
+        offset = Subscription.objects.count()
+        return [
+            Subscription.objects.create(
+                user=User.objects.create_user(f"user{n}", f"user{n}@example.com", 'password'),
+                model=self.model,
+                **fields
+            )
+            for n in range(offset, offset + count)
+        ]
+
+
+class FailingChannel(NotificationChannel):
+
+    def send(self, notifications):
+        return {notification.id: 'unreachable' for notification in notifications}
+
+
+@override_settings(NOTIFICATION_MAX_ATTEMPTS=3, NOTIFICATION_RETRY_BASE_SECONDS=60,
+                   NOTIFICATION_OUTBOX_LEASE_SECONDS=300)
+class OutboxDispatcherTests(SubscriberTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.notifications = [
+            Notification.objects.create(subscription=sub, model=self.model)
+            for sub in self.subscribe(3)
+        ]
+
+    def test_claim_leases_due_rows_only(self):
+        later = timezone.now() + timedelta(minutes=10)
+        Notification.objects.filter(id=self.notifications[2].id).update(next_attempt_at=later)
+
+        claimed = OutboxDispatcher().claim()
+
+        self.assertEqual([n.id for n in claimed], [n.id for n in self.notifications[:2]])
+        self.assertTrue(all(n.attempts == 1 for n in claimed))
+        self.assertTrue(all(n.next_attempt_at > timezone.now() + timedelta(seconds=290) for n in claimed))
+        # Leased rows aren't claimed again until the lease runs out
+        self.assertEqual(OutboxDispatcher().claim(), [])
+
+    def test_claim_restricted_to_given_ids(self):
+        claimed = OutboxDispatcher().claim([self.notifications[1].id])
+
+        self.assertEqual([n.id for n in claimed], [self.notifications[1].id])
+
+    def test_dispatch_sends_and_marks_sent(self):
+        report = OutboxDispatcher().dispatch_once()
+
+        self.assertEqual((report['claimed'], report['sent'], report['failed']), (3, 3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(Notification.objects.exclude(status=Notification.STATUS_SENT).exists())
+        self.assertFalse(Notification.objects.filter(next_attempt_at__isnull=False).exists())
+
+    def test_failure_is_retried_with_backoff(self):
+        with patch.dict(CHANNELS, {Notification.TYPE_EMAIL: FailingChannel()}):
+            report = OutboxDispatcher().dispatch_once()
+
+        self.assertEqual((report['sent'], report['retrying'], report['failed']), (0, 3, 0))
+        notification = Notification.objects.get(id=self.notifications[0].id)
+        self.assertEqual(notification.status, Notification.STATUS_PENDING)
+        self.assertEqual(notification.error_message, 'unreachable')
+        self.assertAlmostEqual(
+            (notification.next_attempt_at - timezone.now()).total_seconds(), retry_delay(1), delta=5
+        )
+
+    def test_gives_up_after_max_attempts(self):
+        Notification.objects.update(attempts=2)
+
+        with patch.dict(CHANNELS, {Notification.TYPE_EMAIL: FailingChannel()}):
+            report = OutboxDispatcher().dispatch_once()
+
+        self.assertEqual((report['retrying'], report['failed']), (0, 3))
+        self.assertFalse(Notification.objects.exclude(status=Notification.STATUS_FAILED).exists())
+        self.assertEqual(OutboxDispatcher().claim(), [])
+
+    def test_retry_delay_doubles(self):
+        self.assertEqual([retry_delay(attempts) for attempts in (1, 2, 3, 4)], [60, 120, 240, 480])
+
+
+class UpsertModelsTests(TestCase):
+
+    def setUp(self):
+        self.service = ChaturbateService()
+
+    def parsed(self, *rows):
+        parsed = {}
+        for model_id, name, is_online in rows:
+            data = {
+                'model_id': model_id, 'user_name': name, 'unique_user_name': name, 'display_name': name,
+                'image': '', 'source': self.service.source, 'json_data': {}, 'is_online': is_online,
+            }
+            data['content_hash'] = self.service.fingerprint(data)
+            parsed[model_id] = data
+        return parsed
+
+    def test_counts_inserted_updated_and_unchanged(self):
+        self.service.upsert_models(self.parsed(('1', 'anna', True), ('2', 'bea', False)), Config())
+
+        stats = self.service.upsert_models(
+            self.parsed(('1', 'anna', True), ('2', 'bea', True), ('3', 'cleo', True)), Config()
+        )
+
+        self.assertEqual(stats, {'inserted': 1, 'updated': 1, 'unchanged': 1})
+        self.assertTrue(WebcamModel.objects.get(model_id='2').is_online)
+        # Online events: anna and cleo first seen online, bea coming online
+        self.assertEqual(
+            sorted(ModelStatusEvent.objects.filter(is_online=True).values_list('model__model_id', flat=True)),
+            ['1', '2', '3']
+        )
+
+    def test_duplicate_name_gets_a_suffix(self):
+        create_model('old', unique_user_name='anna')
+
+        stats = self.service.upsert_models(self.parsed(('1', 'anna', True)), Config())
+
+        self.assertEqual(stats['inserted'], 1)
+        self.assertNotEqual(WebcamModel.objects.get(model_id='1').unique_user_name.lower(), 'anna')
+
+    def test_rejected_row_is_not_counted(self):
+        # A name taken after the duplicate check (e.g. by an overlapping run)
+        create_model('old', unique_user_name='anna')
+
+        with patch.object(ChaturbateService, 'handle_duplicate_usernames'):
+            with self.assertLogs('models_app.services', 'ERROR'):
+                stats = self.service.upsert_models(self.parsed(('1', 'anna', True), ('2', 'bea', True)), Config())
+
+        self.assertEqual(stats['inserted'], 1)
+        self.assertEqual(
+            list(WebcamModel.objects.filter(model_id__in=['1', '2']).values_list('model_id', flat=True)), ['2']
+        )
+
+
+class OnlineStatusTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.service = ChaturbateService()
+        self.source = self.service.source
+
+    def test_transitions_and_events(self):
+        create_model('a', is_online=True)
+        create_model('b', is_online=True)
+        create_model('c', is_online=False, nudity_check_interval=3600,
+                     nudity_next_check=timezone.now() + timedelta(hours=1))
+
+        changes = self.service.update_online_status(['b', 'c'], self.source)
+
+        self.assertEqual(changes, {'online': ['c'], 'offline': ['a']})
+        self.assertEqual(
+            dict(WebcamModel.objects.values_list('model_id', 'is_online')), {'a': False, 'b': True, 'c': True}
+        )
+        self.assertEqual(
+            sorted(ModelStatusEvent.objects.values_list('model__model_id', 'is_online')),
+            [('a', False), ('c', True)]
+        )
+        # A show that just started is due a nudity check regardless of its backoff
+        c = WebcamModel.objects.get(model_id='c')
+        self.assertIsNone(c.nudity_check_interval)
+        self.assertIsNone(c.nudity_next_check)
+
+    def test_stale_cached_set_heals(self):
+        self.service.update_online_status(['a'], self.source)
+        # Flipped offline behind the cached online set's back
+        create_model('a', is_online=False)
+
+        changes = self.service.update_online_status(['a'], self.source)
+
+        self.assertEqual(changes, {'online': ['a'], 'offline': []})
+        self.assertTrue(WebcamModel.objects.get(model_id='a').is_online)
+
+    def test_unchanged_feed_records_nothing(self):
+        create_model('a', is_online=True)
+        self.service.update_online_status(['a'], self.source)
+
+        self.assertEqual(self.service.update_online_status(['a'], self.source), {'online': [], 'offline': []})
+        self.assertFalse(ModelStatusEvent.objects.exists())
+
+
+@override_settings(NOTIFICATION_SHARD_SIZE=2, NOTIFICATION_MAX_SHARDS=3)
+class PlanShardsTests(SubscriberTestCase):
+
+    def test_database_ranges_cover_due_subscriptions(self):
+        subscriptions = self.subscribe(5)
+        ids = [sub.id for sub in subscriptions]
+
+        count, shards = plan_shards(self.model.id)
+
+        self.assertEqual(count, 5)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual((shards[0][0], shards[-1][1]), (ids[0], ids[-1]))
+        covered = [sub_id for sub_id in ids if any(first <= sub_id <= last for first, last in shards)]
+        self.assertEqual(covered, ids)
+
+    def test_index_boundaries_are_open_ended(self):
+        ids = [sub.id for sub in self.subscribe(5)]
+
+        with patch('models_app.fanout.get_subscription_ids', return_value=ids):
+            count, shards = plan_shards(self.model.id)
+
+        # 5 ids in 3 shards of 2: first shard from 0, last one without an upper bound
+        self.assertEqual(count, 5)
+        self.assertEqual(shards, [(0, ids[1]), (ids[1] + 1, ids[3]), (ids[3] + 1, None)])
+
+    def test_nothing_planned_during_cooldown(self):
+        subscriptions = self.subscribe(3, last_notified_at=timezone.now())
+
+        self.assertEqual(plan_shards(self.model.id), (0, []))
+        with patch('models_app.fanout.get_subscription_ids', return_value=[sub.id for sub in subscriptions]):
+            self.assertEqual(plan_shards(self.model.id), (0, []))
+
+
+@override_settings(NUDITY_CHECK_MIN_INTERVAL=300, NUDITY_CHECK_MAX_INTERVAL=3600)
+class ScheduleNextCheckTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.model = WebcamModel(is_naked=False)
+
+    def test_negative_checks_double_up_to_the_max(self):
+        intervals = []
+        for _ in range(6):
+            schedule_next_check(self.model, self.now, changed=False)
+            intervals.append(self.model.nudity_check_interval)
+
+        self.assertEqual(intervals, [600, 1200, 2400, 3600, 3600, 3600])
+        self.assertEqual(self.model.nudity_next_check, self.now + timedelta(seconds=3600))
+
+    def test_change_or_positive_resets_to_the_min(self):
+        self.model.nudity_check_interval = 2400
+        schedule_next_check(self.model, self.now, changed=True)
+        self.assertEqual(self.model.nudity_check_interval, 300)
+
+        self.model.nudity_check_interval = 2400
+        self.model.is_naked = True
+        schedule_next_check(self.model, self.now, changed=False)
+        self.assertEqual(self.model.nudity_check_interval, 300)
+
+    def test_failed_check_keeps_the_pace(self):
+        self.model.nudity_check_interval = 1200
+        schedule_next_check(self.model, self.now, changed=None)
+
+        self.assertEqual(self.model.nudity_check_interval, 1200)
+        self.assertEqual(self.model.nudity_next_check, self.now + timedelta(seconds=1200))
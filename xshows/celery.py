@@ -24,18 +24,18 @@ app.conf.beat_schedule = {
         'args': (100,),  # Limit per platform
     },
 
+    # Prune old online/offline transition events daily
+    'prune-model-status-events': {
+        'task': 'models_app.tasks.prune_model_status_events',
+        'schedule': crontab(minute=30, hour=3),
+    },
+
     # Check nudity for subscribed models every 5 minutes
     'check-nudity-for-subscriptions': {
         'task': 'models_app.tasks.check_subscribed_models_for_nudity',
         'schedule': crontab(minute='*/5'),
     },
 
-    # Cleanup old cached images every hour (privacy)
-    'cleanup-nudity-cache': {
-        'task': 'models_app.tasks.cleanup_old_nudity_cache',
-        'schedule': crontab(minute=0),  # Every hour
-    },
-
     # Update popular models every 10 minutes
     'update-popular-models': {
         'task': 'models_app.tasks.update_popular_models',
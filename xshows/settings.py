@@ -214,12 +214,76 @@ CELERY_RESULT_EXPIRES = 3600  # 1 hour
 CELERY_TASK_IGNORE_RESULT = False
 CELERY_TASK_STORE_ERRORS_EVEN_IF_IGNORED = True
 
+# Scraping: rows per bulk INSERT/UPDATE when saving platform data
+SCRAPE_BATCH_SIZE = int(os.getenv('SCRAPE_BATCH_SIZE', 500))
+# Parse platform API responses incrementally instead of loading the whole payload
+SCRAPE_STREAM_RESPONSES = os.getenv('SCRAPE_STREAM_RESPONSES', 'True') == 'True'
+# Max in-flight API requests per platform, and keep-alive connections kept per host
+SCRAPE_CONCURRENCY_PER_PLATFORM = int(os.getenv('SCRAPE_CONCURRENCY_PER_PLATFORM', 4))
+SCRAPE_HTTP_POOL_SIZE = int(os.getenv('SCRAPE_HTTP_POOL_SIZE', 10))
+# Seconds the resolved egress IP (Chaturbate client_ip) is cached
+SCRAPE_CLIENT_IP_TTL = int(os.getenv('SCRAPE_CLIENT_IP_TTL', 3600))
+# Seconds the last known online set per platform is trusted before re-reading it from the database
+SCRAPE_ONLINE_SET_TTL = int(os.getenv('SCRAPE_ONLINE_SET_TTL', 1800))
+# Days of online/offline transition events kept in model_status_events
+MODEL_STATUS_EVENT_RETENTION_DAYS = int(os.getenv('MODEL_STATUS_EVENT_RETENTION_DAYS', 7))
+
 # Site URL (for notifications and links)
 SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
 
 # Memory optimization for t3.small (2GB RAM)
-# Limit nudity checks per run to prevent memory exhaustion
-MAX_NUDITY_CHECKS_PER_RUN = int(os.getenv('MAX_NUDITY_CHECKS_PER_RUN', 20))
+# Limit nudity checks per run; memory per task is bounded by NUDITY_BATCH_SIZE
+MAX_NUDITY_CHECKS_PER_RUN = int(os.getenv('MAX_NUDITY_CHECKS_PER_RUN', 100))
+# Snapshots per batched NudeNet forward pass
+NUDITY_BATCH_SIZE = int(os.getenv('NUDITY_BATCH_SIZE', 8))
+# Inference passes per check task; the next pass's snapshots are prefetched during the current one
+NUDITY_BATCHES_PER_TASK = int(os.getenv('NUDITY_BATCHES_PER_TASK', 4))
+# Parallel snapshot downloads per worker, max snapshot size, and seconds a batch may spend downloading
+NUDITY_DOWNLOAD_CONCURRENCY = int(os.getenv('NUDITY_DOWNLOAD_CONCURRENCY', 8))
+NUDITY_MAX_IMAGE_BYTES = int(os.getenv('NUDITY_MAX_IMAGE_BYTES', 5 * 1024 * 1024))
+NUDITY_DOWNLOAD_BUDGET_SECONDS = int(os.getenv('NUDITY_DOWNLOAD_BUDGET_SECONDS', 20))
+# Seconds between scheduler runs, and the share of worker time the checks may use per run
+NUDITY_CHECK_CYCLE_SECONDS = int(os.getenv('NUDITY_CHECK_CYCLE_SECONDS', 300))
+NUDITY_CHECK_WORKER_SHARE = float(os.getenv('NUDITY_CHECK_WORKER_SHARE', 0.5))
+# Adaptive per-model re-check interval in seconds: reset to the minimum on a positive or new
+# imagery, doubled after each negative with unchanged imagery up to the maximum
+NUDITY_CHECK_MIN_INTERVAL = int(os.getenv('NUDITY_CHECK_MIN_INTERVAL', 300))
+NUDITY_CHECK_MAX_INTERVAL = int(os.getenv('NUDITY_CHECK_MAX_INTERVAL', 3600))
+# Seconds a verdict stays in the shared cache keyed by image hash
+NUDITY_RESULT_CACHE_TTL = int(os.getenv('NUDITY_RESULT_CACHE_TTL', 86400))
+# Max dHash Hamming distance (out of 64 bits) for a frame to reuse the last verdict; -1 disables
+NUDITY_PHASH_MAX_DISTANCE = int(os.getenv('NUDITY_PHASH_MAX_DISTANCE', 6))
+# Skin-ratio pre-filter: frames with less than this fraction of skin-toned pixels (measured at
+# NUDITY_PREFILTER_SIZE px) skip NudeNet. Tune with manage.py evaluate_nudity_prefilter
+NUDITY_PREFILTER_ENABLED = os.getenv('NUDITY_PREFILTER_ENABLED', 'True') == 'True'
+NUDITY_PREFILTER_MIN_SKIN_RATIO = float(os.getenv('NUDITY_PREFILTER_MIN_SKIN_RATIO', 0.02))
+NUDITY_PREFILTER_SIZE = int(os.getenv('NUDITY_PREFILTER_SIZE', 64))
+# Resident inference server (manage.py run_inference_server): 'host:port' or a unix socket path; empty runs NudeNet in each worker
+NUDITY_INFERENCE_SERVER = os.getenv('NUDITY_INFERENCE_SERVER', '')
+# Milliseconds the server waits to fill a micro-batch with requests from other workers
+NUDITY_INFERENCE_MAX_WAIT_MS = int(os.getenv('NUDITY_INFERENCE_MAX_WAIT_MS', 20))
+# Load the model in the worker when the server is unreachable (False keeps worker memory flat)
+NUDITY_INFERENCE_LOCAL_FALLBACK = os.getenv('NUDITY_INFERENCE_LOCAL_FALLBACK', 'True') == 'True'
+
+# Notifications created and queued per delivery task when a model's subscribers are notified
+NOTIFICATION_CHUNK_SIZE = int(os.getenv('NOTIFICATION_CHUNK_SIZE', 200))
+# Subscriptions per fan-out shard (id range handled by one worker), and max shards per model
+NOTIFICATION_SHARD_SIZE = int(os.getenv('NOTIFICATION_SHARD_SIZE', 1000))
+NOTIFICATION_MAX_SHARDS = int(os.getenv('NOTIFICATION_MAX_SHARDS', 8))
+# Outbox delivery (manage.py run_notification_dispatcher) instead of per-chunk Celery delivery tasks
+NOTIFICATION_OUTBOX_ENABLED = os.getenv('NOTIFICATION_OUTBOX_ENABLED', 'False') == 'True'
+# Rows claimed per dispatcher batch, seconds a claim is held, and seconds to sleep when idle
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv('NOTIFICATION_OUTBOX_BATCH_SIZE', 200))
+NOTIFICATION_OUTBOX_LEASE_SECONDS = int(os.getenv('NOTIFICATION_OUTBOX_LEASE_SECONDS', 300))
+NOTIFICATION_OUTBOX_POLL_SECONDS = float(os.getenv('NOTIFICATION_OUTBOX_POLL_SECONDS', 2))
+# Delivery attempts before a notification is marked failed; retries wait base * 2^(attempt - 1) seconds
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', 5))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv('NOTIFICATION_RETRY_BASE_SECONDS', 60))
+
+# Redis index of active subscriptions per model (manage.py rebuild_subscription_index to (re)build it).
+# Kept in its own db, apart from the cache; readers fall back to the database if sets get evicted
+SUBSCRIPTION_INDEX_ENABLED = os.getenv('SUBSCRIPTION_INDEX_ENABLED', 'True') == 'True'
+SUBSCRIPTION_INDEX_REDIS_URL = os.getenv('SUBSCRIPTION_INDEX_REDIS_URL', 'redis://127.0.0.1:6379/2')
 
 # Twitter API Configuration
 TWITTER_API_KEY = os.getenv('TWITTER_API_KEY', '')